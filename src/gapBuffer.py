@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+class GapBuffer():
+    """ Gap buffer holding the characters of an editable string (e.g. the prompt).
+        The unused gap is kept at the last edited position, so inserting and deleting at the cursor is O(1) amortized
+        (O(distance) when the cursor has moved). The string is only built when it is asked for.
+    """
+
+    MIN_GAP_SIZE = 64
+
+    def __init__(self, string=""):
+        """ Init.
+            Arguments:
+                string              - The initial string.                       (str)
+        """
+        self.set_string(string)
+
+
+    def __len__(self):
+        """ Returns the number of characters in the buffer. """
+        return len(self.__buffer) - (self.__gapEnd - self.__gapStart)
+
+
+    def set_string(self, string):
+        """ Replaces the content of the buffer.
+            Arguments:
+                string              - The new string.                           (str)
+        """
+        self.__buffer = list(string) + [None] * self.MIN_GAP_SIZE
+        self.__gapStart = len(string)
+        self.__gapEnd = len(self.__buffer)
+        self.__string = string     # Materialized string, None until asked for after an edit
+
+
+    def clear(self):
+        """ Removes all characters from the buffer. """
+        self.set_string("")
+
+
+    def insert(self, position, string):
+        """ Inserts a string at a given position.
+            Arguments:
+                position            - The position to insert at.                (int)
+                string              - The string to be inserted.                (str)
+        """
+        if string == "":
+            return
+
+        self.__move_gap(position)
+
+        # Grow the gap proportionally to the content to keep inserts O(1) amortized
+        if len(string) > self.__gapEnd - self.__gapStart:
+            growth = len(string) + len(self) + self.MIN_GAP_SIZE
+            self.__buffer[self.__gapEnd:self.__gapEnd] = [None] * growth
+            self.__gapEnd += growth
+
+        self.__buffer[self.__gapStart:self.__gapStart + len(string)] = string
+        self.__gapStart += len(string)
+        self.__string = None
+
+
+    def delete(self, position, count=1):
+        """ Deletes characters starting at a given position.
+            Arguments:
+                position            - The position of the first character.      (int)
+                count               - The number of characters to delete.       (int)
+        """
+        count = min(count, len(self) - position)
+        if position < 0 or count <= 0:
+            return
+
+        self.__move_gap(position)
+        self.__gapEnd += count
+        self.__string = None
+
+
+    def get_slice(self, start, end):
+        """ Returns the characters between two positions without building the whole string.
+            Arguments:
+                start               - The position of the first character.      (int)
+                end                 - The position after the last character.    (int)
+        """
+        start = max(start, 0)
+        end = min(end, len(self))
+        if start >= end:
+            return ""
+
+        gapSize = self.__gapEnd - self.__gapStart
+        if end <= self.__gapStart:
+            return "".join(self.__buffer[start:end])
+        elif start >= self.__gapStart:
+            return "".join(self.__buffer[start + gapSize:end + gapSize])
+        return "".join(self.__buffer[start:self.__gapStart]) + "".join(self.__buffer[self.__gapEnd:end + gapSize])
+
+
+    def get_string(self):
+        """ Returns the whole string, it is built once per edit. """
+        if self.__string == None:
+            self.__string = "".join(self.__buffer[:self.__gapStart]) + "".join(self.__buffer[self.__gapEnd:])
+        return self.__string
+
+
+    def __move_gap(self, position):
+        """ Moves the gap so that it starts at a given position.
+            Arguments:
+                position            - The new start of the gap.                 (int)
+        """
+        if position < self.__gapStart:
+            count = self.__gapStart - position
+            self.__buffer[self.__gapEnd - count:self.__gapEnd] = self.__buffer[position:self.__gapStart]
+            self.__gapStart -= count
+            self.__gapEnd -= count
+        elif position > self.__gapStart:
+            count = position - self.__gapStart
+            self.__buffer[self.__gapStart:self.__gapStart + count] = self.__buffer[self.__gapEnd:self.__gapEnd + count]
+            self.__gapStart += count
+            self.__gapEnd += count
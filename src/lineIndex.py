@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+class LineIndex():
+    """ Fenwick tree (binary indexed tree) of the wrapped line count of every text item in a box.
+        Maps a line offset to the text item and sub-line it belongs to in O(log n). Appending and changing a count are
+        O(log n), removing the oldest count is O(1) amortized (the tree is compacted once removed counts dominate).
+    """
+
+    def __init__(self, counts=None):
+        """ Init.
+            Arguments:
+                counts              - Initial line count of every text item.    (list)
+        """
+        self.rebuild(counts if counts != None else list())
+
+
+    def __len__(self):
+        """ Returns the number of text items in the index. """
+        return len(self.__counts) - self.__head
+
+
+    def rebuild(self, counts):
+        """ Rebuilds the index from scratch in O(n).
+            Arguments:
+                counts              - Line count of every text item.            (list)
+        """
+        self.__counts = list(counts)
+        self.__head = 0         # Number of removed counts at the start of self.__counts
+        self.__headLines = 0    # Sum of the removed counts, which are left in the tree
+        self.__total = sum(self.__counts)
+
+        self.__tree = [0] + self.__counts
+        size = len(self.__tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self.__tree[parent] += self.__tree[i]
+
+
+    def append(self, count):
+        """ Appends the line count of a new text item.
+            Arguments:
+                count               - The line count of the text item.          (int)
+        """
+        self.__counts.append(count)
+        position = len(self.__counts)
+
+        # The new node covers the range (position - lowbit, position]
+        self.__tree.append(count + self.__prefix(position - 1) - self.__prefix(position - (position & -position)))
+        self.__total += count
+
+
+    def extend(self, counts):
+        """ Appends the line counts of several new text items.
+            Arguments:
+                counts              - The line counts of the text items.        (list)
+        """
+        # A large batch is cheaper to add by rebuilding the whole tree in O(n)
+        if len(counts) > len(self) // 8:
+            self.rebuild(self.__counts[self.__head:] + list(counts))
+        else:
+            for count in counts:
+                self.append(count)
+
+
+    def pop_left(self):
+        """ Removes the line count of the oldest text item. """
+        if len(self) == 0:
+            raise Exception("LineIndex is empty.")
+
+        count = self.__counts[self.__head]
+        self.__headLines += count
+        self.__total -= count
+        self.__head += 1
+
+        # Compact once the removed counts dominate, the O(n) rebuild is amortized over the removals
+        if self.__head > 1024 and self.__head * 2 > len(self.__counts):
+            self.rebuild(self.__counts[self.__head:])
+
+
+    def get_count(self, index):
+        """ Returns the line count of a text item.
+            Arguments:
+                index               - The index of the text item.               (int)
+        """
+        return self.__counts[self.__head + index]
+
+
+    def set_count(self, index, count):
+        """ Sets the line count of a text item.
+            Arguments:
+                index               - The index of the text item.               (int)
+                count               - The line count of the text item.          (int)
+        """
+        position = self.__head + index
+        delta = count - self.__counts[position]
+        if delta == 0:
+            return
+
+        self.__counts[position] = count
+        self.__total += delta
+
+        position += 1
+        while position < len(self.__tree):
+            self.__tree[position] += delta
+            position += position & -position
+
+
+    def get_total(self):
+        """ Returns the total line count of all text items. """
+        return self.__total
+
+
+    def get_prefix_sum(self, index):
+        """ Returns the line count of all text items before a given text item.
+            Arguments:
+                index               - The index of the text item.               (int)
+        """
+        return self.__prefix(self.__head + index) - self.__headLines
+
+
+    def find(self, line):
+        """ Returns the index of the text item that contains a given line together with the sub-line within it.
+            Arguments:
+                line                - The line offset from the first line.      (int)
+        """
+        target = line + self.__headLines
+
+        # Binary lifting, find the last position whose prefix sum is <= target
+        position = 0
+        step = 1 << (len(self.__tree).bit_length() - 1)
+        while step > 0:
+            nextPosition = position + step
+            if nextPosition < len(self.__tree) and self.__tree[nextPosition] <= target:
+                position = nextPosition
+                target -= self.__tree[nextPosition]
+            step >>= 1
+
+        return position - self.__head, target
+
+
+    def __prefix(self, position):
+        """ Returns the sum of the first 'position' counts (including removed ones).
+            Arguments:
+                position            - Number of counts to sum.                  (int)
+        """
+        total = 0
+        while position > 0:
+            total += self.__tree[position]
+            position -= position & -position
+        return total
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+from collections import deque
+
+
+class RenderStats():
+    """ Wall time and call count of every update stage (and of every box in per box stages).
+        Keeps the last windowSize times of every stage for rolling percentiles.
+    """
+
+    def __init__(self, windowSize=1000, callback=None):
+        """ Init.
+            Arguments:
+                windowSize          - Number of recent times kept per stage.            (int)
+                callback            - Called with the times of every update.            (Function)
+        """
+        self.windowSize = windowSize
+        self.callback = callback
+
+        self.__updates = 0
+        self.__stages = dict()      # Stage name -> [calls, total time, recent times]
+        self.__boxes = dict()       # Box name -> stage name -> [calls, total time, recent times]
+
+        self.__current = None       # Times of the update in progress
+        self.__start = None
+        self.__last = None
+
+
+    def start_update(self):
+        """ Starts timing an update. """
+        self.__current = {"stages": dict(), "boxes": dict()}
+        self.__start = self.__last = time.perf_counter()
+
+
+    def mark(self, stage):
+        """ Records the time since the previous mark (or the start of the update) as the time of a stage.
+            Arguments:
+                stage               - The stage name.                                   (str)
+        """
+        now = time.perf_counter()
+        stages = self.__current["stages"]
+        stages[stage] = stages.get(stage, 0) + now - self.__last
+        self.__last = now
+
+
+    def add_box_time(self, boxName, stage, seconds):
+        """ Records the time of a stage for one box.
+            Arguments:
+                boxName             - The name of the text box.                         (str)
+                stage               - The stage name.                                   (str)
+                seconds             - The time of the stage.                            (float)
+        """
+        boxStages = self.__current["boxes"].setdefault(boxName, dict())
+        boxStages[stage] = boxStages.get(stage, 0) + seconds
+
+
+    def end_update(self):
+        """ Ends timing an update, adds its times to the statistics and calls the callback. """
+        current = self.__current
+        current["total"] = time.perf_counter() - self.__start
+        self.__current = None
+        self.__updates += 1
+
+        self.__add_time(self.__stages, "total", current["total"])
+        for stage, seconds in current["stages"].items():
+            self.__add_time(self.__stages, stage, seconds)
+        for boxName, boxStages in current["boxes"].items():
+            for stage, seconds in boxStages.items():
+                self.__add_time(self.__boxes.setdefault(boxName, dict()), stage, seconds)
+
+        if self.callback != None:
+            self.callback(current)
+
+
+    def get_stats(self):
+        """ Returns the number of updates and calls, total time and p50/p95/p99 (s) of every stage and box stage. """
+        return {
+            "updates"   : self.__updates,
+            "stages"    : {stage: self.__summarize(entry) for stage, entry in self.__stages.items()},
+            "boxes"     : {boxName: {stage: self.__summarize(entry) for stage, entry in boxStages.items()}
+                           for boxName, boxStages in self.__boxes.items()}
+        }
+
+
+    def __add_time(self, entries, stage, seconds):
+        """ Adds a time to the entry of a stage.
+            Arguments:
+                entries             - Stage name -> entry dictionary.                   (dict)
+                stage               - The stage name.                                   (str)
+                seconds             - The time of the stage.                            (float)
+        """
+        if stage not in entries:
+            entries[stage] = [0, 0, deque(maxlen=self.windowSize)]
+        entry = entries[stage]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2].append(seconds)
+
+
+    def __summarize(self, entry):
+        """ Returns the summary of a stage entry.
+            Arguments:
+                entry               - [calls, total time, recent times].                (list)
+        """
+        recent = sorted(entry[2])
+        percentile = lambda p: recent[min(int(len(recent) * p), len(recent) - 1)]
+        return {
+            "calls"     : entry[0],
+            "total"     : entry[1],
+            "p50"       : percentile(0.50),
+            "p95"       : percentile(0.95),
+            "p99"       : percentile(0.99)
+        }
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import curses
+import sys
+import threading
+
+from collections import deque
+
+
+# Screen backends used by TerminalTextBoxes. A backend provides:
+#   start()                                     - Initializes the screen and returns its window.
+#   stop()                                      - Restores the screen.
+#   color_pair(number)                          - Returns the attribute value of a color pair.
+#   init_color_pair(number, foreground, background)
+#   set_bracketed_paste(enabled)
+#   newpad(height, width)                       - Returns a new pad.
+#   doupdate()                                  - Updates the screen with everything copied by noutrefresh.
+#   setsyx(y, x)                                - Sets where doupdate leaves the terminal cursor.
+# The returned window implements the subset of the curses window API that is used:
+#   addstr, clear, noutrefresh, refresh, move, getmaxyx, get_wch, timeout
+# And a pad:
+#   addstr, erase, getmaxyx, leaveok, touchwin, noutrefresh(pminrow, pmincol, sminrow, smincol, smaxrow, smaxcol)
+
+
+
+class CursesScreen():
+    """ Screen backend that draws to the terminal with curses. """
+
+    def start(self):
+        """ Initializes curses and returns the curses window. """
+        window = curses.initscr()
+        window.keypad(True)
+        curses.noecho()
+        curses.start_color()
+        curses.use_default_colors()
+        return window
+
+
+    def stop(self):
+        """ Closes curses. """
+        curses.endwin()
+
+
+    def color_pair(self, number):
+        """ Returns the attribute value of a color pair.
+            Arguments:
+                number              - The color pair number.                    (int)
+        """
+        return curses.color_pair(number)
+
+
+    def init_color_pair(self, number, foreground, background):
+        """ Initializes a color pair.
+            Arguments:
+                number              - The color pair number.                    (int)
+                foreground          - The foreground color.                     (int)
+                background          - The background color (-1 : default).      (int)
+        """
+        curses.init_pair(number, foreground, background)
+
+
+    def set_bracketed_paste(self, enabled):
+        """ Enables/Disables bracketed paste mode of the terminal.
+            Arguments:
+                enabled             - Should bracketed paste be enabled.        (bool)
+        """
+        sys.stdout.write("\x1b[?2004h" if enabled else "\x1b[?2004l")
+        sys.stdout.flush()
+
+
+    def newpad(self, height, width):
+        """ Returns a new curses pad.
+            Arguments:
+                height              - The number of rows.                       (int)
+                width               - The number of columns.                    (int)
+        """
+        return curses.newpad(height, width)
+
+
+    def doupdate(self):
+        """ Updates the terminal with all windows and pads copied by noutrefresh since the last update. """
+        curses.doupdate()
+
+
+    def setsyx(self, y, x):
+        """ Sets where the next doupdate leaves the terminal cursor, regardless of the leaveok windows copied.
+            Arguments:
+                y                   - The row.                                  (int)
+                x                   - The column.                               (int)
+        """
+        curses.setsyx(y, x)
+
+
+
+class VirtualScreen():
+    """ In-memory screen backend (and window) without a terminal, for running headless (e.g. tests, benchmarks).
+        Keeps a grid of characters and attributes, keys and resizes are scripted with push_keys() and resize().
+        The window draws straight to the grid, pads are virtual screens that noutrefresh copies onto their screen.
+    """
+
+    def __init__(self, height=24, width=80):
+        """ Init.
+            Arguments:
+                height              - The number of rows.                       (int)
+                width               - The number of columns.                    (int)
+        """
+        self.__height = height
+        self.__width = width
+        self.__cursor = (0, 0)
+        self.__terminalCursor = (0, 0)  # Where the last doupdate left the cursor
+        self.__updateCursor = None      # Where the next doupdate leaves the cursor (None : unchanged)
+        self.__leaveok = False
+        self.__timeout = -1
+        self.__keys = deque()
+        self.__keysCondition = threading.Condition()
+        self.__parent = None        # The screen of a pad
+
+        self.addstrCount = 0        # Number of addstr calls
+        self.refreshCount = 0       # Number of refresh calls
+
+        self.clear()
+
+
+    def start(self):
+        """ Returns the window, which is the virtual screen itself. """
+        return self
+
+
+    def stop(self):
+        """ Nothing to restore. """
+        pass
+
+
+    def color_pair(self, number):
+        """ Returns the attribute value of a color pair (Same value as curses).
+            Arguments:
+                number              - The color pair number.                    (int)
+        """
+        return number << 8
+
+
+    def init_color_pair(self, number, foreground, background):
+        """ Color pairs have no effect on the virtual screen. """
+        pass
+
+
+    def set_bracketed_paste(self, enabled):
+        """ Pastes are scripted with push_keys(). """
+        pass
+
+
+    def newpad(self, height, width):
+        """ Returns a new pad. Raises curses.error like curses if it would have no rows or columns.
+            Arguments:
+                height              - The number of rows.                       (int)
+                width               - The number of columns.                    (int)
+        """
+        if height <= 0 or width <= 0:
+            raise curses.error("curses function returned NULL")
+
+        pad = VirtualScreen(height, width)
+        pad.__parent = self
+        return pad
+
+
+    def doupdate(self):
+        """ Nothing to draw, the terminal cursor is left where the last copied window or pad left it. """
+        self.refreshCount += 1
+        if self.__updateCursor != None:
+            self.__terminalCursor = self.__updateCursor
+            self.__updateCursor = None
+
+
+    def setsyx(self, y, x):
+        """ Sets where the next doupdate leaves the terminal cursor.
+            Arguments:
+                y                   - The row.                                  (int)
+                x                   - The column.                               (int)
+        """
+        self.__updateCursor = (y, x)
+
+
+    def addstr(self, y, x, string, attr=0):
+        """ Writes a string at a position, wrapping at the end of rows like curses.
+            Raises curses.error if the position is outside the screen or the string does not fit.
+            Arguments:
+                y                   - The row.                                  (int)
+                x                   - The column.                               (int)
+                string              - The string to be written.                 (str)
+                attr                - The attributes of the string.             (int)
+        """
+        self.addstrCount += 1
+
+        if y < 0 or y >= self.__height or x < 0 or x >= self.__width:
+            raise curses.error("addstr() returned ERR")
+
+        for char in string:
+            self.__chars[y][x] = char
+            self.__attrs[y][x] = attr
+            x += 1
+            if x == self.__width:
+                x = 0
+                y += 1
+                if y == self.__height:
+                    # Like curses, the cursor can not move past the last cell
+                    self.__cursor = (self.__height - 1, self.__width - 1)
+                    raise curses.error("addstr() returned ERR")
+        self.__cursor = (y, x)
+
+
+    def clear(self):
+        """ Clears the screen. """
+        self.__chars = [[" "] * self.__width for i in range(self.__height)]
+        self.__attrs = [[0] * self.__width for i in range(self.__height)]
+
+
+    def erase(self):
+        """ Clears the screen. """
+        self.clear()
+
+
+    def refresh(self):
+        """ Nothing to draw. """
+        self.refreshCount += 1
+
+
+    def noutrefresh(self, pminrow=0, pmincol=0, sminrow=0, smincol=0, smaxrow=0, smaxcol=0):
+        """ Copies a region of a pad onto its screen, nothing to copy for the screen itself. Like curses, the cursor
+            of the window is where doupdate leaves the terminal cursor, unless the window is leaveok, which leaves it
+            after the region copied.
+            Arguments:
+                pminrow             - The first pad row.                        (int)
+                pmincol             - The first pad column.                     (int)
+                sminrow             - The first screen row.                     (int)
+                smincol             - The first screen column.                  (int)
+                smaxrow             - The last screen row.                      (int)
+                smaxcol             - The last screen column.                   (int)
+        """
+        if self.__parent == None:
+            self.__updateCursor = self.__cursor
+            return
+
+        # Like curses, the region must not be empty or outside the screen
+        height, width = self.__parent.getmaxyx()
+        if sminrow > smaxrow or smincol > smaxcol or smaxrow >= height or smaxcol >= width:
+            raise curses.error("pnoutrefresh() returned ERR")
+
+        self.__parent.__updateCursor = (smaxrow, smaxcol + 1) if self.__leaveok else \
+                (sminrow + self.__cursor[0] - pminrow, smincol + self.__cursor[1] - pmincol)
+
+        width = smaxcol - smincol + 1
+        for row in range(smaxrow - sminrow + 1):
+            self.__parent.__chars[sminrow + row][smincol:smaxcol + 1] = \
+                    self.__chars[pminrow + row][pmincol:pmincol + width]
+            self.__parent.__attrs[sminrow + row][smincol:smaxcol + 1] = \
+                    self.__attrs[pminrow + row][pmincol:pmincol + width]
+
+
+    def leaveok(self, flag):
+        """ Sets whether noutrefresh leaves the terminal cursor where the copy ended instead of at the cursor.
+            Arguments:
+                flag                - Leave the cursor.                         (bool)
+        """
+        self.__leaveok = flag
+
+
+    def touchwin(self):
+        """ noutrefresh always copies the whole region. """
+        pass
+
+
+    def move(self, y, x):
+        """ Moves the cursor.
+            Arguments:
+                y                   - The row.                                  (int)
+                x                   - The column.                               (int)
+        """
+        if y < 0 or y >= self.__height or x < 0 or x >= self.__width:
+            raise curses.error("wmove() returned ERR")
+        self.__cursor = (y, x)
+
+
+    def getmaxyx(self):
+        """ Returns the screen size (height, width). """
+        return self.__height, self.__width
+
+
+    def timeout(self, delay):
+        """ Sets how long get_wch waits for a key.
+            Arguments:
+                delay               - Time in ms (< 0 : wait forever).          (int)
+        """
+        self.__timeout = delay
+
+
+    def get_wch(self):
+        """ Returns the next scripted key. Raises curses.error if there is none within the timeout. """
+        with self.__keysCondition:
+            if not self.__keys and self.__timeout != 0:
+                self.__keysCondition.wait(None if self.__timeout < 0 else self.__timeout / 1000)
+            if not self.__keys:
+                raise curses.error("no input")
+            return self.__keys.popleft()
+
+
+    def push_keys(self, keys):
+        """ Adds keys to the input, as returned by get_wch (str for characters, int for special keys).
+            Arguments:
+                keys                - A string or an iterable of keys.          (str/iterable)
+        """
+        with self.__keysCondition:
+            self.__keys.extend(keys)
+            self.__keysCondition.notify_all()
+
+
+    def resize(self, height, width):
+        """ Resizes the screen (clearing it) and adds a KEY_RESIZE key to the input like a terminal resize.
+            Arguments:
+                height              - The number of rows.                       (int)
+                width               - The number of columns.                    (int)
+        """
+        self.__height = height
+        self.__width = width
+        self.__cursor = (0, 0)
+        self.clear()
+        self.push_keys([curses.KEY_RESIZE])
+
+
+    def get_cursor(self):
+        """ Returns the cursor position (y, x). """
+        return self.__cursor
+
+
+    def get_terminal_cursor(self):
+        """ Returns where the last doupdate left the terminal cursor (y, x). """
+        return self.__terminalCursor
+
+
+    def get_lines(self):
+        """ Returns the characters of every row as strings. """
+        return ["".join(row) for row in self.__chars]
+
+
+    def get_attr(self, y, x):
+        """ Returns the attributes of a cell.
+            Arguments:
+                y                   - The row.                                  (int)
+                x                   - The column.                               (int)
+        """
+        return self.__attrs[y][x]
@@ -6,9 +6,14 @@ import sys
 import time
 import threading
 
-from pynput.keyboard import Key, Controller
-from textwrap import wrap
-
+from collections import deque
+from itertools import islice
+
+from gapBuffer import GapBuffer
+from renderStats import RenderStats
+from screens import CursesScreen, VirtualScreen
+from textBox import BoxSetup, TextBox
+from textItem import TextItem
 from unicode import isUnicode
 
 if sys.platform == "win32":
@@ -92,17 +97,31 @@ DBG_BOX_PLACEMENT = {
 DBG_BOX_INFO = {
     "name"                  : 0,
     "textSize"              : 1,
-    "boxSize"               : 2
+    "boxSize"               : 2,
+    "performance"           : 3
 }
 
 
 
+class CompiledAttributes(int):
+    """ Merged text attributes returned by TerminalTextBoxes.compile_attributes().
+        Can be used wherever attributes are expected, without being validated and merged again.
+    """
+    __slots__ = ()
+
+
+
 class TerminalTextBoxes():
     """ Terminal Text Boxes Class. """
 
-    def __init__(self, charCallback=None, enterCallback=None):
-        """ Init. """
-        self.__fakeKeyboard = Controller()
+    def __init__(self, charCallback=None, enterCallback=None, screen=None):
+        """ Init.
+            Arguments:
+                charCallback        - Called with every key press.                              (Function)
+                enterCallback       - Called with the prompt string when <ENTER> is pressed.    (Function)
+                screen              - Screen backend, CursesScreen (default) or VirtualScreen.  (object)
+        """
+        self.__screenBackend = screen if screen != None else CursesScreen()
 
         self.__isActive = False
 
@@ -111,6 +130,7 @@ class TerminalTextBoxes():
         self.__promptEnterCallbackFunction = enterCallback
 
         self.__FRAME_SIZE = 1
+        self.__PAD_PAGES = 3        # Height of the box pads in text heights (viewport, one page above and below)
 
         # Resize variables
         self.__resizeDone               = True
@@ -118,7 +138,7 @@ class TerminalTextBoxes():
 
         # Terminal Box Setups
         self.__boxSetup                 = dict()
-        self.__activeBoxSetup           = None
+        self.__activeSetup              = None  # The active BoxSetup
 
         # Prompt variables
         self.__promptSign               = "> "
@@ -126,7 +146,7 @@ class TerminalTextBoxes():
         self.__promptWidth              = None # Will be the same as self.__wTerminal
         self.__promptHeight             = 1
         self.__promptLineWidth          = None # Will be self.__wTerminal - (self.__promptSignSize + 1)
-        self.__promptString             = ""
+        self.__prompt                   = GapBuffer() # The prompt string
         self.__promptCursorPos          = 0
         self.__promptVCursorPos         = 0
         self.__promptVLeftPos           = 0
@@ -137,10 +157,59 @@ class TerminalTextBoxes():
         self.__infoPromptCharAttr       = "white"
         self.__infoPromptTextAttr       = "yellow"
         self.__infoPromptHeight         = 1
-        self.__infoPromptCurrText    = ""
+        self.__infoPromptCurrText       = ""
         self.__infoPromptActive         = False
+        self.__infoPromptPending        = False # Text without timeout that has not been shown yet
         self.__infoPromptTextIndent     = 3
-        self.__infoPromptTimer          = threading.Timer(5, self.__reset_info_prompt)
+        self.__infoPromptTimer          = threading.Timer(5, self.__info_prompt_text_timeout)
+
+        # Thread variables
+        self.__lock                     = threading.RLock() # Guards box state while it is updated
+        self.__textItemQueue            = deque()   # Appended text items waiting for the key handler thread
+        self.__infoPromptQueue          = deque()   # Info prompt texts (text, timeout) waiting for the next update
+        self.__updateRequested          = threading.Event()
+        self.__forceRedrawRequested     = False
+        self.__keyHandlerThread         = None
+        self.__INPUT_POLL_TIMEOUT       = 20        # Max time (ms) the key handler waits for a key
+        self.__IDLE_STEP_TIME           = 5         # Max time (ms) of one idle step of wrapping deferred text items
+
+        # Bracketed paste variables
+        self.__pendingKeys              = deque()   # Keys read ahead while looking for a paste start sequence
+        self.__PASTE_START              = "\x1b[200~"
+        self.__PASTE_END                = "\x1b[201~"
+        self.__PASTE_TIMEOUT            = 50        # Max time (ms) to wait for the next key of a paste
+
+        # Render scheduler variables
+        self.__maxFps                   = 60        # Max number of requested updates per second (None : no cap)
+        self.__lastRenderTime           = 0
+
+        # Render instrumentation (None : disabled)
+        self.__renderStats              = None
+
+        # Performance debug info variables
+        self.__renderTimes              = deque(maxlen=1000)    # Time of recent updates, for fps
+        self.__inputLatency             = None  # Time (s) from a key press until it was drawn
+
+        # Damage tracking variables
+        self.__dirtyAll                 = True  # Repaint the entire screen on next update
+        self.__dirtyPrompt              = True  # Repaint the prompt row on next update
+        self.__dirtyInfoPrompt          = True  # Repaint the info prompt row on next update
+        self.__paintedSetup             = None  # The setup shown by the last update
+
+        # Layout variables, the box layout is cached per setup
+        self.__layoutVersion            = 0     # Bumped by every change of the box configuration
+        self.__layoutKey                = None  # Terminal size, layout version and debug settings of the prompt
+                                                # variables
+
+        # Frame strings per (box width, box height, frame style, debug, debug placement), cleared when a layout is
+        # solved so that only the box sizes of the current terminal size are kept
+        self.__frameCache               = dict()
+
+        # Regions (y, x, maxY, maxX) of the setup window drawn since the last update
+        self.__windowRegions            = list()
+
+        # Merged attributes per attributes tuple
+        self.__attributeCache           = dict()
 
         # Minimum sizes
         self.__PROMPT_MIN_WIDTH         = self.__promptSignSize + 10
@@ -159,19 +228,22 @@ class TerminalTextBoxes():
     # PUBLIC FUNCTIONS                                                                                                #
     ###################################################################################################################
 
-    def start(self):
-        """ Start displaying the terminal text boxes module. """
+    def start(self, keyHandlerThread=True):
+        """ Start displaying the terminal text boxes module.
+            Arguments:
+                keyHandlerThread    - Start the key handler thread. If False, keys are handled by calling
+                                      process_input() and update() updates the screen right away.       (bool)
+        """
         # Terminal window initialization
         if not self.__boxSetup:
             raise Exception("There are no setups created.")
-        if len(self.__boxSetup[self.__activeBoxSetup]["boxes"]) == 0:
+        if len(self.__activeSetup.boxes) == 0:
             raise Exception("There are no boxes in the active box setup.")
 
         self.__isActive = True
 
-        self.__screen = curses.initscr()
-        self.__screen.keypad(True)
-        curses.noecho()
+        self.__screen = self.__screenBackend.start()
+        self.__screenBackend.set_bracketed_paste(True)
 
         self.__init_colors()
 
@@ -179,16 +251,33 @@ class TerminalTextBoxes():
 
         self.update()
 
-        event = threading.Event()
-        thread = threading.Thread(target=self.__key_handler, args=(event,))
-        thread.start()
+        if keyHandlerThread:
+            # From here on the screen is only touched by the key handler thread
+            event = threading.Event()
+            self.__keyHandlerThread = threading.Thread(target=self.__key_handler, args=(event,))
+            self.__keyHandlerThread.start()
 
 
     def stop(self):
         """ Stop displaying the terminal text boxes module. """
         self.__isActive = False
 
-        self.__fakeKeyboard.press(Key.esc)
+        # The key handler thread notices within its poll timeout and restores the screen itself
+        if self.__keyHandlerThread == None:
+            self.__screenBackend.set_bracketed_paste(False)
+            self.__screenBackend.stop()
+
+
+    def process_input(self):
+        """ Handles every key that is available right away and updates the screen once. Used instead of the key
+            handler thread when started with keyHandlerThread=False. Without a key, one step of the idle task that
+            wraps deferred text items is run instead. Returns False if <ESC> was pressed.
+        """
+        char = self.__get_available_key()
+        if char == None:
+            self.__wrap_deferred_lines()
+            return True
+        return self.__handle_keys(char)
 
 
     def create_text_box_setup(self, setupName):
@@ -198,12 +287,11 @@ class TerminalTextBoxes():
         """
         self.__check_box_setup_valid(setupName, False)
 
-        self.__boxSetup[setupName]                  = dict()
-        self.__boxSetup[setupName]["boxes"]         = dict()
-        self.__boxSetup[setupName]["boxOrder"]      = list()
-        self.__boxSetup[setupName]["focusedBox"]    = None
+        with self.__lock:
+            self.__boxSetup[setupName] = BoxSetup(setupName)
 
-        self.__activeBoxSetup = setupName
+            self.__activeSetup = self.__boxSetup[setupName]
+            self.__layoutVersion += 1
 
 
     def remove_text_box_setup(self, setupName):
@@ -213,18 +301,20 @@ class TerminalTextBoxes():
         """
         self.__check_box_setup_valid(setupName)
 
-        self.__boxSetup.pop(setupName)
+        with self.__lock:
+            self.__boxSetup.pop(setupName)
+            self.__layoutVersion += 1
 
-        if len(self.__boxSetup) == 0:
-            self.__activeBoxSetup = None
-            raise Exception("No more box setups left.")
-        else:
-            self.__activeBoxSetup = next(iter(self.__boxSetup))
+            if len(self.__boxSetup) == 0:
+                self.__activeSetup = None
+                raise Exception("No more box setups left.")
+            else:
+                self.__activeSetup = next(iter(self.__boxSetup.values()))
 
 
     def create_text_box(self, setupName, boxName, width=None, height=None, hPos=None, vPos=None, hOrient=0, vOrient=0,
                         visable=True, wTextIndent=0, hTextIndent=0, frameChar="singleLine", frameAttr="white",
-                        scrollVisable=True):
+                        scrollVisable=True, maxItems=None, maxLines=None, virtual=False):
         """ Creates a text box inside the given text box setup.
             Arguments:
                 setupName           - The name of the box setup.                                    (str)
@@ -241,67 +331,90 @@ class TerminalTextBoxes():
                 frameChar           - What frame style should be used (check FRAME_STYLE dict).     (str)
                 frameAttr           - What frame attributes should be used (color, text format).    (str/list)
                 scrollVisable       - Should the scrollbar be visable or not.                       (bool)
+                maxItems            - Max number of text items kept (None if unbounded).            (int)
+                maxLines            - Max number of wrapped lines kept (None if unbounded).         (int)
+                virtual             - Only wrap the text items needed to fill the viewport.         (bool)
         """
         self.__check_text_box_valid(setupName, boxName, False)
-        self.__init_box_default_parameters(setupName, boxName)
-
-        if width != None:
-            self.__is_type(width, int)
-        if width != None and width < self.__BOX_MIN_WIDTH:
-            raise Exception(f"width is too small, must be bigger than or equal to {self.__BOX_MIN_WIDTH}")
-        if width != None and width < (self.__BOX_MIN_WIDTH + 2 * wTextIndent):
-            raise Exception(f"width is too small, must be bigger than or equal to {self.__BOX_MIN_WIDTH + 2 * wTextIndent}")
-        self.__boxSetup[setupName]["boxes"][boxName]["fixedWidth"] = width
-
-        if height != None:
-            self.__is_type(height, int)
-        if height != None and height < self.__BOX_MIN_HEIGHT:
-            raise Exception(f"height is too small, must be bigger than or equal to {self.__BOX_MIN_HEIGHT}")
-        if height != None and height < (self.__BOX_MIN_HEIGHT + 2 * hTextIndent):
-            raise Exception(f"height is too small, must be bigger than or equal to {self.__BOX_MIN_HEIGHT + 2 * hTextIndent}")
-        self.__boxSetup[setupName]["boxes"][boxName]["fixedHeight"] = height
-
-        if not isinstance(hOrient, int) or hOrient not in H_ORIENT.values():
-            raise Exception("hOrient is not of integer type or not within acceptable range.")
-        self.__boxSetup[setupName]["boxes"][boxName]["hOrient"] = hOrient
-
-        if not isinstance(vOrient, int) or vOrient not in V_ORIENT.values():
-            raise Exception("vOrient is not of integer type or not within acceptable range.")
-        self.__boxSetup[setupName]["boxes"][boxName]["vOrient"] = vOrient
-
-        if hPos != None:
-            self.__is_type(hPos, int)
-            self.__boxSetup[setupName]["boxOrder"].insert(hPos, boxName)
-
-            if self.__boxSetup[setupName]["boxOrder"].index(boxName) > 0:
-                prevBoxIndex = self.__boxSetup[setupName]["boxOrder"].index(boxName) - 1
+
+        with self.__lock:
+            self.__init_box_default_parameters(setupName, boxName)
+
+            if width != None:
+                self.__is_type(width, int)
+            if width != None and width < self.__BOX_MIN_WIDTH:
+                raise Exception(f"width is too small, must be bigger than or equal to {self.__BOX_MIN_WIDTH}")
+            if width != None and width < (self.__BOX_MIN_WIDTH + 2 * wTextIndent):
+                raise Exception(f"width is too small, must be bigger than or equal to {self.__BOX_MIN_WIDTH + 2 * wTextIndent}")
+            self.__boxSetup[setupName].boxes[boxName].fixedWidth = width
+
+            if height != None:
+                self.__is_type(height, int)
+            if height != None and height < self.__BOX_MIN_HEIGHT:
+                raise Exception(f"height is too small, must be bigger than or equal to {self.__BOX_MIN_HEIGHT}")
+            if height != None and height < (self.__BOX_MIN_HEIGHT + 2 * hTextIndent):
+                raise Exception(f"height is too small, must be bigger than or equal to {self.__BOX_MIN_HEIGHT + 2 * hTextIndent}")
+            self.__boxSetup[setupName].boxes[boxName].fixedHeight = height
+
+            if not isinstance(hOrient, int) or hOrient not in H_ORIENT.values():
+                raise Exception("hOrient is not of integer type or not within acceptable range.")
+            self.__boxSetup[setupName].boxes[boxName].hOrient = hOrient
+
+            if not isinstance(vOrient, int) or vOrient not in V_ORIENT.values():
+                raise Exception("vOrient is not of integer type or not within acceptable range.")
+            self.__boxSetup[setupName].boxes[boxName].vOrient = vOrient
+
+            if hPos != None:
+                self.__is_type(hPos, int)
+                self.__boxSetup[setupName].boxOrder.insert(hPos, boxName)
+
+                if self.__boxSetup[setupName].boxOrder.index(boxName) > 0:
+                    prevBoxIndex = self.__boxSetup[setupName].boxOrder.index(boxName) - 1
+                else:
+                    prevBoxIndex = 0
+
+                self.__boxSetup[setupName].boxes[boxName].hOrient = \
+                        self.__boxSetup[setupName].boxes[self.__boxSetup[setupName].boxOrder[prevBoxIndex]].hOrient
+
+                # TODO: fix vPos as well, check how big list is? (How deep vertical is)
+            elif hOrient == H_ORIENT["left"]:
+                self.__boxSetup[setupName].boxOrder.insert(0, boxName)
+            elif hOrient == H_ORIENT["right"]:
+                self.__boxSetup[setupName].boxOrder.append(boxName)
             else:
-                prevBoxIndex = 0
+                self.__boxSetup[setupName].boxOrder.append(boxName)
+            # Sort dict according to boxOrder
+            self.__boxSetup[setupName].boxes = \
+                    {key : self.__boxSetup[setupName].boxes[key] for key in self.__boxSetup[setupName].boxOrder}
 
-            self.__boxSetup[setupName]["boxes"][boxName]["hOrient"] = \
-                    self.__boxSetup[setupName]["boxes"][self.__boxSetup[setupName]["boxOrder"][prevBoxIndex]]["hOrient"]
+            self.__is_type(visable, bool)
+            self.__boxSetup[setupName].boxes[boxName].visable = visable
 
-            # TODO: fix vPos as well, check how big list is? (How deep vertical is)
-        elif hOrient == H_ORIENT["left"]:
-            self.__boxSetup[setupName]["boxOrder"].insert(0, boxName)
-        elif hOrient == H_ORIENT["right"]:
-            self.__boxSetup[setupName]["boxOrder"].append(boxName)
-        else:
-            self.__boxSetup[setupName]["boxOrder"].append(boxName)
-        # Sort dict according to boxOrder
-        self.__boxSetup[setupName]["boxes"] = \
-                {key : self.__boxSetup[setupName]["boxes"][key] for key in self.__boxSetup[setupName]["boxOrder"]}
+            self.__is_type(wTextIndent, int)
+            self.__is_type(hTextIndent, int)
+            self.__boxSetup[setupName].boxes[boxName].wTextIndent = wTextIndent
+            self.__boxSetup[setupName].boxes[boxName].hTextIndent = hTextIndent
+            self.__boxSetup[setupName].boxes[boxName].frameChar = frameChar
+            self.__boxSetup[setupName].boxes[boxName].frameAttrUnmerged = frameAttr
+            self.__boxSetup[setupName].boxes[boxName].scrollVisable = scrollVisable
 
-        self.__is_type(visable, bool)
-        self.__boxSetup[setupName]["boxes"][boxName]["visable"] = visable
+            if maxItems != None:
+                self.__is_type(maxItems, int)
+                if maxItems < 1:
+                    raise Exception("maxItems must be bigger than or equal to 1.")
+            self.__boxSetup[setupName].boxes[boxName].maxItems = maxItems
+
+            if maxLines != None:
+                self.__is_type(maxLines, int)
+                if maxLines < 1:
+                    raise Exception("maxLines must be bigger than or equal to 1.")
+            self.__boxSetup[setupName].boxes[boxName].maxLines = maxLines
 
-        self.__is_type(wTextIndent, int)
-        self.__is_type(hTextIndent, int)
-        self.__boxSetup[setupName]["boxes"][boxName]["wTextIndent"] = wTextIndent
-        self.__boxSetup[setupName]["boxes"][boxName]["hTextIndent"] = hTextIndent
-        self.__boxSetup[setupName]["boxes"][boxName]["frameChar"] = frameChar
-        self.__boxSetup[setupName]["boxes"][boxName]["frameAttrUnmerged"] = frameAttr
-        self.__boxSetup[setupName]["boxes"][boxName]["scrollVisable"] = scrollVisable
+            self.__is_type(virtual, bool)
+            self.__boxSetup[setupName].boxes[boxName].virtual = virtual
+
+            self.__layoutVersion += 1
+            self.__boxSetup[setupName].paintKey = None
 
 
     def remove_text_box(self, setupName, boxName):
@@ -312,57 +425,54 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        self.__boxSetup[setupName]["boxes"].pop(boxName)
+        with self.__lock:
+            self.__boxSetup[setupName].boxes.pop(boxName)
+            self.__layoutVersion += 1
 
-        if len(self.__boxSetup[setupName]["boxes"]) == 0:
-            self.__boxSetup[setupName]["focusedBox"]= None
-            raise Exception("No more text boxes left in the setup.")
-        else:
-            self.__boxSetup[setupName]["focusedBox"]= next(iter(self.__boxSetup[setupName]["boxes"]))
+            if len(self.__boxSetup[setupName].boxes) == 0:
+                self.__boxSetup[setupName].focusedBox = None
+                raise Exception("No more text boxes left in the setup.")
+            else:
+                self.__boxSetup[setupName].focusedBox = next(iter(self.__boxSetup[setupName].boxes.values()))
+
+            self.__boxSetup[setupName].paintKey = None
 
 
     def set_info_prompt_text(self, text, timeout=None):
-        """ Sets info message above the prompt.
+        """ Sets info message above the prompt. Can be called from any thread, the message is drawn on next update.
             Arguments:
                 text                - The text to be set in the info prompt.            (str)
                 timeout             - Timeout before message disappears (ms).           (int)
         """
         self.__is_type(text, str)
-        self.__reset_info_prompt()
-
-        infoPromptY = self.__hTerminal - 1 - self.__promptHeight
-        textStartX = self.__infoPromptTextIndent + 1
-        textMaxLen = self.__wTerminal - (self.__infoPromptTextIndent * 2) - 2
-        textEndX = textStartX + len(text[:textMaxLen])
 
-        self.__infoPromptCurrText = text
-        bgAttr = self.__merge_attributes(self.__infoPromptCharAttr)
-        textAttr = self.__merge_attributes(self.__infoPromptTextAttr)
+        # Queued without locking like text items, an update in progress must not block the caller
+        self.__infoPromptQueue.append((text, timeout))
+        self.__updateRequested.set()
 
-        self.__screen.addstr(infoPromptY, self.__infoPromptTextIndent," ", bgAttr)
-        self.__screen.addstr(infoPromptY, textStartX, text[:textMaxLen], textAttr)
-        self.__screen.addstr(infoPromptY, textEndX," ", bgAttr)
 
-        if timeout != None:
-            self.__infoPromptTimer.cancel()
-            self.__infoPromptTimer = threading.Timer(timeout//1000, self.__info_prompt_text_timeout)
-            self.__infoPromptTimer.start()
-            self.__infoPromptActive = True
-        self.__screen.refresh()
+    def compile_attributes(self, attributes):
+        """ Validates and merges attributes once and returns them as a reusable token that can be passed as attributes
+            to any other function (e.g. add_text_item) without being validated again.
+            Arguments:
+                attributes          - The text attributes (color, text format).     (str/list)
+        """
+        return CompiledAttributes(self.__merge_attributes(attributes))
 
 
     def add_text_item(self, setupName, boxName, text, attributes="white", lineType="wrap"):
-        """ Adds a text item to the textItems list of the given text box.
+        """ Adds a text item to the textItems list of the given text box. Can be called from any thread, the item is
+            queued and added to the box on next update.
             Arguments:
                 setupName           - The name of the box setup.        (str)
                 boxName             - The name of the text box.         (str)
                 text                - The text to be added.             (str)
-                attributes          - The text attributes.              (str/list)
+                attributes          - The text attributes.              (str/list/CompiledAttributes)
                 lineType            - The line type (wrap/single).      (str)
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        if self.__boxSetup[setupName]["boxes"][boxName]["visable"] == False:
+        if self.__boxSetup[setupName].boxes[boxName].visable == False:
             raise Exception(f"Can not add text item to an invisable box.")
 
         attributes = self.__merge_attributes(attributes)
@@ -370,10 +480,39 @@ class TerminalTextBoxes():
         if lineType not in LINE_TYPE:
             raise Exception(f"Line type {lineType} does not exist.")
 
-        self.__boxSetup[setupName]["boxes"][boxName]["prevTextItemsLength"] = \
-                len(self.__boxSetup[setupName]["boxes"][boxName]["textItems"])
+        self.__textItemQueue.append((setupName, boxName, [TextItem(text, attributes, LINE_TYPE[lineType])]))
+
+
+    def add_text_items(self, setupName, boxName, textItems, attributes="white", lineType="wrap"):
+        """ Adds several text items to the textItems list of the given text box in one step.
+            The box is validated once and the items are queued as one batch. Can be called from any thread.
+            Arguments:
+                setupName           - The name of the box setup.                                    (str)
+                boxName             - The name of the text box.                                     (str)
+                textItems           - Iterable of texts or (text, attributes[, lineType]) tuples.   (iterable)
+                attributes          - The text attributes of items that does not specify any.       (str/list)
+                lineType            - The line type of items that does not specify any.             (str)
+        """
+        self.__check_text_box_valid(setupName, boxName)
+
+        box = self.__boxSetup[setupName].boxes[boxName]
+        if box.visable == False:
+            raise Exception(f"Can not add text item to an invisable box.")
+
+        # Validate everything before the box is modified
+        newItems = list()
+        for textItem in textItems:
+            if isinstance(textItem, str):
+                textItem = (textItem,)
+            itemAttributes = textItem[1] if len(textItem) > 1 else attributes
+            itemLineType = textItem[2] if len(textItem) > 2 else lineType
+
+            if itemLineType not in LINE_TYPE:
+                raise Exception(f"Line type {itemLineType} does not exist.")
 
-        self.__boxSetup[setupName]["boxes"][boxName]["textItems"].append([text, attributes, LINE_TYPE[lineType]])
+            newItems.append(TextItem(textItem[0], self.__merge_attributes(itemAttributes), LINE_TYPE[itemLineType]))
+
+        self.__textItemQueue.append((setupName, boxName, newItems))
 
 
     def remove_text_item(self, setupName, boxName, index):
@@ -385,12 +524,17 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        length = len(self.__boxSetup[setupName]["boxes"][boxName]["textItems"])
+        with self.__lock:
+            self.__drain_text_item_queue()
+
+            length = len(self.__boxSetup[setupName].boxes[boxName].textItems)
 
-        if index >= length or index <= (-length):
-            raise Exception("index is out of boundary of textItems.")
+            if index >= length or index <= (-length):
+                raise Exception("index is out of boundary of textItems.")
 
-        del self.__boxSetup[setupName]["boxes"][boxName]["textItems"][index]
+            del self.__boxSetup[setupName].boxes[boxName].textItems[index]
+            self.__boxSetup[setupName].boxes[boxName].linesStale = True
+            self.__bump_box_generation(self.__boxSetup[setupName].boxes[boxName])
 
 
     def clear_text_items(self, setupName, boxName):
@@ -401,19 +545,247 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["textItems"] = list()
+        with self.__lock:
+            self.__drain_text_item_queue()
+
+            self.__boxSetup[setupName].boxes[boxName].textItems = deque()
+            self.__boxSetup[setupName].boxes[boxName].linesStale = True
+            self.__bump_box_generation(self.__boxSetup[setupName].boxes[boxName])
+
+
+    def scroll_to_item(self, setupName, boxName, index):
+        """ Scrolls a text box so that a given text item is at the top of the text area.
+            Arguments:
+                setupName           - The name of the box setup.            (str)
+                boxName             - The name of the text box.             (str)
+                index               - The index of the text item.           (int)
+        """
+        self.__check_text_box_valid(setupName, boxName)
+        self.__is_type(index, int)
+
+        with self.__lock:
+            self.__drain_text_item_queue()
+
+            box = self.__boxSetup[setupName].boxes[boxName]
+            self.__check_box_layout_valid(box)
+
+            length = len(box.textItems)
+            if index >= length or index < (-length):
+                raise Exception("index is out of boundary of textItems.")
+            index = index % length
+
+            self.__update_line_index(box)
+
+            # Estimated text items (of a virtual box or deferred) are wrapped down to the requested one so that its
+            # position is exact
+            if box.exactFrom > index:
+                while box.exactFrom > index:
+                    box.exactFrom -= 1
+                    item = box.textItems[box.exactFrom]
+                    box.lineIndex.set_count(box.exactFrom, self.__wrap_text_item(item, box.textWidth))
+                box.linesGen += 1
+
+            startLine = box.lineIndex.get_prefix_sum(index)
+            box.scrollIndex = startLine - (box.lineIndex.get_total() - box.textHeight)
+            self.__clamp_scroll_index(box)
+            self.__bump_box_generation(box)
+
+
+    def scroll_to_percentage(self, setupName, boxName, percentage):
+        """ Scrolls a text box to a percentage of its lines (0 : oldest line at the top, 100 : newest at the bottom).
+            Arguments:
+                setupName           - The name of the box setup.            (str)
+                boxName             - The name of the text box.             (str)
+                percentage          - The scroll position (0 - 100).        (int/float)
+        """
+        self.__check_text_box_valid(setupName, boxName)
+        self.__is_type(percentage, (int, float))
+        if percentage < 0 or percentage > 100:
+            raise Exception("percentage must be within 0 - 100.")
+
+        with self.__lock:
+            self.__drain_text_item_queue()
+
+            box = self.__boxSetup[setupName].boxes[boxName]
+            self.__check_box_layout_valid(box)
+
+            self.__update_line_index(box)
+
+            scrollableLines = max(box.lineIndex.get_total() - box.textHeight, 0)
+            box.scrollIndex = -round(scrollableLines * (100 - percentage) / 100)
+            self.__bump_box_generation(box)
 
 
     ###################################################################################################################
     # UPDATE FUNCTIONS                                                                                                #
     ###################################################################################################################
 
-    def update(self):
-        """ Updates all. """
+    def update(self, forceRedraw=False):
+        """ Requests an update of all components that have been marked dirty since the last update.
+            Once started, updates are performed by the key handler thread at most max fps times per second, any number
+            of requests in between are coalesced into one update. Key presses are updated immediately.
+            Arguments:
+                forceRedraw         - Repaint the entire screen regardless of damage.   (bool)
+        """
+        if self.__keyHandlerThread == None:
+            self.__render(forceRedraw)
+            return
+
+        self.__forceRedrawRequested = self.__forceRedrawRequested or forceRedraw
+        self.__updateRequested.set()
+
+
+    def __render(self, forceRedraw=False):
+        """ Updates all components that have been marked dirty since the last update.
+            Arguments:
+                forceRedraw         - Repaint the entire screen regardless of damage.   (bool)
+        """
+        with self.__lock:
+            self.__lastRenderTime = time.monotonic()
+            self.__updateRequested.clear()
+            forceRedraw = forceRedraw or self.__forceRedrawRequested
+            self.__forceRedrawRequested = False
+
+            stats = self.__renderStats
+            if stats != None:
+                stats.start_update()
+
+            # Add the text items and info prompt texts that producers have queued since the last update
+            self.__drain_text_item_queue()
+            self.__drain_info_prompt_queue()
+            if stats != None:
+                stats.mark("textItemQueue")
+
+            self.__hTerminal, self.__wTerminal = self.__screen.getmaxyx() # Get the terminal size
+
+            # Update the prompt/box sizes and edge conditions, unless the layout is unchanged
+            if self.__update_layout() and stats != None:
+                stats.mark("layout")
+
+            # Anything that moves every component requires a full repaint, unless the setup window was painted for
+            # the same terminal size and debug settings
+            paintKey = (self.__hTerminal, self.__wTerminal, self.debug, self.dbgBoxPlacementShow,
+                        self.dbgBoxInfoShow)
+            if forceRedraw or paintKey != self.__activeSetup.paintKey:
+                self.__dirtyAll = True
+
+            # Info prompt text without timeout is only shown until the next update
+            if not self.__infoPromptActive and self.__infoPromptCurrText != "":
+                self.__dirtyInfoPrompt = True
+
+            # The live performance info is redrawn every update
+            perfInfo = self.debug and self.dbgBoxInfoShow == DBG_BOX_INFO["performance"]
+            if perfInfo:
+                self.__renderTimes.append(time.monotonic())
+                self.__dirtyInfoPrompt = True
+
+            # A pad copies its whole region to the screen. The setup window is copied whole after a full repaint, a
+            # switch of setup or a frame, which covers the text areas, so all box pads are copied again after it.
+            # Otherwise only the regions drawn (scrollbars, performance info) are copied.
+            touchPads = False
+
+            if self.__updateConditionsSatisfied and self.__resizeDone:
+                # A setup that was switched to is copied from its window and box pads
+                touchPads = self.__dirtyAll or self.__activeSetup is not self.__paintedSetup
+
+                # Update text format by re-wrapping text to match new box sizes
+                self.__update_text_wrapping(stats)
+                if stats != None:
+                    stats.mark("textWrapping")
+
+                # Clear the screen and the setup window
+                if self.__dirtyAll:
+                    self.__screen.clear()
+                    self.__update_setup_window()
+                    self.__dirtyPrompt = True
+                    self.__dirtyInfoPrompt = True
+                    if stats != None:
+                        stats.mark("clear")
+
+                # Update all the boxes frames
+                if self.__update_box_frames() > 0:
+                    touchPads = True
+                if stats != None:
+                    stats.mark("boxFrames")
+
+                # Update info prompt
+                if self.__dirtyInfoPrompt:
+                    self.__update_info_prompt()
+                    if stats != None:
+                        stats.mark("infoPrompt")
+
+                # Update prompt
+                if self.__dirtyPrompt:
+                    self.__update_prompt()
+                    if stats != None:
+                        stats.mark("prompt")
+
+                # Update all boxes
+                self.__update_boxes(stats, perfInfo)
+                if stats != None:
+                    stats.mark("boxes")
+
+                # Update boxes scrolls
+                self.__update_boxes_scrolls()
+                if stats != None:
+                    stats.mark("boxScrolls")
+
+                # Update the live performance info of the boxes
+                if perfInfo:
+                    self.__update_performance_info()
+                    if stats != None:
+                        stats.mark("performanceInfo")
+
+                # Update the visual cursor
+                self.__update_visual_cursor()
+                if stats != None:
+                    stats.mark("visualCursor")
+
+                self.__dirtyAll = False
+                self.__activeSetup.paintKey = paintKey
+                self.__paintedSetup = self.__activeSetup
+            elif not self.__updateConditionsSatisfied and self.__resizeDone:
+                # A layout change (not only a resize) can leave the painted setup too small for the terminal
+                if self.__paintedSetup != None:
+                    self.__screen.clear()
+                self.__screen.addstr(0,0, "Terminal too small.")
+                self.__activeSetup.paintKey = None
+                self.__paintedSetup = None
+
+            # Copy the screen window, the setup window and then the box pads to the virtual screen, update the
+            # terminal once. The window and pads are leaveok, the terminal cursor is put back on the prompt.
+            self.__screen.noutrefresh()
+            if self.__updateConditionsSatisfied and self.__resizeDone:
+                self.__refresh_setup_window(touchPads)
+                self.__refresh_box_pads(touchPads)
+                self.__screenBackend.setsyx(*self.__get_visual_cursor_pos())
+            self.__screenBackend.doupdate()
+            if stats != None:
+                stats.mark("refresh")
+                stats.end_update()
+
+
+    def __update_layout(self):
+        """ Solves the layout (prompt variables, box variables and edge conditions) of the active setup. Every setup
+            caches its layout for the terminal size and the layout version, which every change of the box
+            configuration bumps. Returns True if the layout was solved, False if the cached layout was used.
+        """
+        layoutKey = (self.__hTerminal, self.__wTerminal, self.__layoutVersion, self.debug, self.dbgBoxPlacementShow)
+        if layoutKey == self.__activeSetup.layoutKey:
+            # The prompt variables might have been solved for another terminal size by another setup
+            if layoutKey != self.__layoutKey:
+                self.__edgeConditions = list()
+                self.__update_prompt_variables(False)
+                self.__layoutKey = layoutKey
+
+            self.__updateConditionsSatisfied = self.__activeSetup.layoutFits
+            return False
+
         # Used to verify that prompt/box sizes doesn't become smaller than min size.
         self.__edgeConditions = list()
 
-        self.__hTerminal, self.__wTerminal = self.__screen.getmaxyx() # Get the terminal size
+        # The frames of the old box sizes are not used again unless the terminal gets its old size back
+        self.__frameCache.clear()
 
         # Update the prompt variables (prompt size)
         self.__update_prompt_variables(False)
@@ -424,31 +796,10 @@ class TerminalTextBoxes():
         # Update edge conditions
         self.__update_box_edge_conditions()
 
-        if self.__updateConditionsSatisfied and self.__resizeDone:
-            # Update text format by re-wrapping text to match new box sizes
-            self.__update_text_wrapping()
-
-            # Clear the screen
-            self.__screen.clear()
-
-            # Update all the boxes frames
-            self.__update_box_frames()
-
-            # Update prompt
-            self.__update_prompt()
-
-            # Update all boxes
-            self.__update_boxes()
-
-            # Update boxes scrolls
-            self.__update_boxes_scrolls()
-
-            # Update the visual cursor
-            self.__update_visual_cursor()
-        elif not self.__updateConditionsSatisfied and self.__resizeDone:
-            self.__screen.addstr(0,0, "Terminal too small.")
-
-        self.__screen.refresh()
+        self.__layoutKey = layoutKey
+        self.__activeSetup.layoutKey = layoutKey
+        self.__activeSetup.layoutFits = self.__updateConditionsSatisfied
+        return True
 
 
     def __update_prompt_variables(self, updateTerminal=True):
@@ -479,16 +830,16 @@ class TerminalTextBoxes():
         if updateTerminal:
             self.__hTerminal, self.__wTerminal = self.__screen.getmaxyx() # Get the terminal size
 
-        nbrOfBoxes = len(self.__boxSetup[self.__activeBoxSetup]["boxes"]) # Total amount of current boxes
+        nbrOfBoxes = len(self.__activeSetup.boxes) # Total amount of current boxes
         nbrOfWUnfixedBoxes = 0      # Number of boxes that does not have fixed width
         nbrOfWFixedBoxes = 0        # Number of boxes that does have fixed width
         wForFixed = 0               # Width of all fixed width boxes together
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            if attr["fixedWidth"] == None:
+        for name, box in self.__activeSetup.boxes.items():
+            if box.fixedWidth == None:
                 nbrOfWUnfixedBoxes = nbrOfWUnfixedBoxes + 1
             else:
                 nbrOfWFixedBoxes = nbrOfWFixedBoxes + 1
-                wForFixed = wForFixed + attr["fixedWidth"]
+                wForFixed = wForFixed + box.fixedWidth
 
         wForUnfixed = 0             # Width of all unfixed width boxes in total
         wForUnused = 0              # Remaining unused width
@@ -511,53 +862,58 @@ class TerminalTextBoxes():
         wForUnusedUsed = False
         hForUnusedUsed = False
         prevVerticalOrientation = None
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            # Update prev variables
-            attr["prevBoxWidth"] = attr["boxWidth"]
-            attr["prevHeight"] = attr["boxHeight"]
+        for name, box in self.__activeSetup.boxes.items():
+            prevGeometry = (box.topLeft, box.bottomRight, box.textStartX, box.textStartY,
+                            box.textWidth, box.textHeight)
 
             # Box Width/ Height
-            if attr["fixedWidth"] == None:
-                attr["boxWidth"] = (wForUnfixed // nbrOfWUnfixedBoxes) + (1 if remainingUnevenWidth > 0 else 0)
+            if box.fixedWidth == None:
+                box.boxWidth = (wForUnfixed // nbrOfWUnfixedBoxes) + (1 if remainingUnevenWidth > 0 else 0)
                 remainingUnevenWidth = (remainingUnevenWidth - 1) if remainingUnevenWidth > 0 else 0
             else:
-                attr["boxWidth"] = attr["fixedWidth"]
-            if attr["fixedHeight"] == None:
-                attr["boxHeight"] = self.__hTerminal - (self.__promptHeight + self.__FRAME_SIZE)
+                box.boxWidth = box.fixedWidth
+            if box.fixedHeight == None:
+                box.boxHeight = self.__hTerminal - (self.__promptHeight + self.__FRAME_SIZE)
             else:
-                attr["boxHeight"] = attr["fixedHeight"]
+                box.boxHeight = box.fixedHeight
 
             # Text Width/ Height
             frameTotalWidth = self.__FRAME_SIZE * 2
-            attr["textWidth"] = attr["boxWidth"] - frameTotalWidth - (attr["wTextIndent"] * 2)
+            box.textWidth = box.boxWidth - frameTotalWidth - (box.wTextIndent * 2)
             frameTotalHeight = (self.__FRAME_SIZE * 2) + (2 if self.debug else 0)
-            attr["textHeight"] = attr["boxHeight"] - frameTotalHeight - (attr["hTextIndent"] * 2)
+            box.textHeight = box.boxHeight - frameTotalHeight - (box.hTextIndent * 2)
 
             # Box orientation horizontal/ vertical
-            if attr["hOrient"] == H_ORIENT["right"] and attr["fixedWidth"] != None and wForUnusedUsed == False:
+            if box.hOrient == H_ORIENT["right"] and box.fixedWidth != None and wForUnusedUsed == False:
                 wIndex = wIndex + wForUnused
                 wForUnusedUsed = True
-            if attr["vOrient"] == V_ORIENT["down"] and attr["fixedHeight"] != None and hForUnusedUsed == False:
-                hIndex = hIndex + (self.__hTerminal - (self.__promptHeight + self.__FRAME_SIZE) - attr["boxHeight"])
+            if box.vOrient == V_ORIENT["down"] and box.fixedHeight != None and hForUnusedUsed == False:
+                hIndex = hIndex + (self.__hTerminal - (self.__promptHeight + self.__FRAME_SIZE) - box.boxHeight)
                 hForUnusedUsed = True
 
             # topLeft point and bottomRight point of the box
-            attr["topLeft"] = {"x" : wIndex, "y" : hIndex}
-            attr["bottomRight"] = {"x" : wIndex + attr["boxWidth"] - 1, "y" : hIndex + attr["boxHeight"] - 1}
+            box.topLeft = {"x" : wIndex, "y" : hIndex}
+            box.bottomRight = {"x" : wIndex + box.boxWidth - 1, "y" : hIndex + box.boxHeight - 1}
 
             # Text start/ end positions
-            attr["textStartX"] = wIndex + self.__FRAME_SIZE + attr["wTextIndent"]
+            box.textStartX = wIndex + self.__FRAME_SIZE + box.wTextIndent
             if self.debug and self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["top"]:
-                attr["textStartY"] = hIndex + 2 + self.__FRAME_SIZE + attr["hTextIndent"]
+                box.textStartY = hIndex + 2 + self.__FRAME_SIZE + box.hTextIndent
             else:
-                attr["textStartY"] = hIndex + self.__FRAME_SIZE + attr["hTextIndent"]
+                box.textStartY = hIndex + self.__FRAME_SIZE + box.hTextIndent
+
+            # A box that moved or changed size leaves stale cells behind, repaint everything
+            if prevGeometry != (box.topLeft, box.bottomRight, box.textStartX, box.textStartY,
+                                box.textWidth, box.textHeight):
+                box.geometryGen += 1
+                self.__dirtyAll = True
 
             hIndex = 0
-            wIndex = wIndex + attr["boxWidth"]
+            wIndex = wIndex + box.boxWidth
 
-            if attr["visable"] == False:
-                self.__edgeConditions.append(attr["boxWidth"] >= (self.__BOX_MIN_WIDTH + 2 * attr["wTextIndent"]))
-                self.__edgeConditions.append(attr["boxHeight"] >= (self.__BOX_MIN_HEIGHT + 2 * attr["hTextIndent"]))
+            if box.visable == False:
+                self.__edgeConditions.append(box.boxWidth >= (self.__BOX_MIN_WIDTH + 2 * box.wTextIndent))
+                self.__edgeConditions.append(box.boxHeight >= (self.__BOX_MIN_HEIGHT + 2 * box.hTextIndent))
 
         self.__updateConditionsSatisfied = all(condition == True for condition in self.__edgeConditions)
 
@@ -568,15 +924,15 @@ class TerminalTextBoxes():
         """ Updates box edge conditions. """
         boxesMinWidth = 0
         boxesMinHeight = self.__BOX_MIN_HEIGHT
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            if attr["fixedWidth"] == None:
-                boxesMinWidth += (self.__BOX_MIN_WIDTH + 2 * attr["wTextIndent"]) if attr["visable"] else 0
+        for name, box in self.__activeSetup.boxes.items():
+            if box.fixedWidth == None:
+                boxesMinWidth += (self.__BOX_MIN_WIDTH + 2 * box.wTextIndent) if box.visable else 0
             else:
-                boxesMinWidth += attr["boxWidth"] if attr["visable"] else 0
+                boxesMinWidth += box.boxWidth if box.visable else 0
 
-            if attr["fixedHeight"] != None:
-                if attr["boxHeight"] > boxesMinHeight:
-                    boxesMinHeight = attr["boxHeight"]
+            if box.fixedHeight != None:
+                if box.boxHeight > boxesMinHeight:
+                    boxesMinHeight = box.boxHeight
 
         self.__edgeConditions.append(self.__wTerminal >= boxesMinWidth)
         self.__edgeConditions.append(self.__hTerminal >= (boxesMinHeight + self.__INFO_PROMPT_MIN_HEIGHT + self.__PROMPT_MIN_HEIGHT))
@@ -584,102 +940,350 @@ class TerminalTextBoxes():
         self.__updateConditionsSatisfied = all(condition == True for condition in self.__edgeConditions)
 
 
-    def __update_text_wrapping(self):
-        """ Updates the text format by re-wrapping text to match new box sizes. """
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            if attr["visable"] == False:
+    def __update_text_wrapping(self, stats=None):
+        """ Updates the line index of every box to match new box sizes and new text items.
+            Only text items that are new or that were wrapped for another text width are wrapped.
+            Arguments:
+                stats               - Render stats to record the time per box in.   (RenderStats)
+        """
+        for name, box in self.__activeSetup.boxes.items():
+            if box.visable == False:
                 continue
 
-            if not (attr["boxWidth"] != attr["prevBoxWidth"] or \
-                    attr["boxHeight"] != attr["prevBoxHeight"] or \
-                    len(attr["textItems"]) != attr["prevTextItemsLength"]):
+            if box.wrappedGen == (box.contentGen, box.geometryGen):
                 continue
 
-            self.__boxSetup[self.__activeBoxSetup]["boxes"][name]["lines"] = list()
-            for item, txtAttr, lineType in attr["textItems"]:
-                if lineType == LINE_TYPE["single"]:
-                    self.__boxSetup[self.__activeBoxSetup]["boxes"][name]["lines"].append(
-                            [item[:attr["textWidth"]], txtAttr])
-                else:
-                    lines = wrap(item, attr["textWidth"])
-                    for line in lines:
-                        self.__boxSetup[self.__activeBoxSetup]["boxes"][name]["lines"].append([line, txtAttr])
+            if stats != None:
+                start = time.perf_counter()
+            self.__update_line_index(box)
+            if stats != None:
+                stats.add_box_time(name, "textWrapping", time.perf_counter() - start)
+
+            # Evicting text items while wrapping bumps the content generation
+            box.wrappedGen = (box.contentGen, box.geometryGen)
+
+
+    def __update_line_index(self, box):
+        """ Updates the line index of a box with new text items and the current text width.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        # Text items added while the setup was inactive are deferred, they are estimated like in a virtual box and
+        # only the viewport is wrapped. The idle task wraps the rest.
+        lazy = box.virtual or box.pendingItems > 0
+        box.pendingItems = 0
+
+        if box.linesWidth != box.textWidth or box.linesStale:
+            box.lineIndex.rebuild([self.__get_line_count(box, item, lazy) for item in box.textItems])
+            box.linesGen += 1
+            box.exactFrom = len(box.textItems) if lazy else 0
+            box.linesWidth = box.textWidth
+            box.linesStale = False
+
+        # Index new text items, a large batch added to a virtual box (or deferred) is estimated and wrapped on demand
+        estimate = lazy and (len(box.textItems) - len(box.lineIndex)) > box.textHeight * 2
+        newItems = islice(box.textItems, len(box.lineIndex), None)
+        if estimate:
+            box.lineIndex.extend([self.__get_line_count(box, item, True) for item in newItems])
+        else:
+            box.lineIndex.extend([self.__wrap_text_item(item, box.textWidth) for item in newItems])
+        if estimate:
+            box.exactFrom = len(box.textItems)
+
+        if box.maxLines != None:
+            self.__trim_lines(box)
+
+        # Trims again if the wrapped viewport exceeds maxLines
+        self.__materialize_lines(box)
+        self.__clamp_scroll_index(box)
+
+
+    def __get_line_count(self, box, item, estimate):
+        """ Returns the wrapped line count of a text item.
+            The count of a text item that is not wrapped for the current text width can be estimated, the estimate
+            is corrected once the text item is displayed.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+                item                - The text item.                        (TextItem)
+                estimate            - Estimate the count instead of wrapping.   (bool)
+        """
+        # A box that has not been laid out yet counts one line per text item
+        if box.textWidth == None:
+            return 1
+
+        if item.wrapWidth == box.textWidth or not estimate:
+            return self.__wrap_text_item(item, box.textWidth)
+
+        return 1 if item.lineType == LINE_TYPE["single"] else (len(item.text) // box.textWidth + 1)
+
+
+    def __materialize_lines(self, box, scrollIndex=None):
+        """ Wraps the estimated text items of a box (virtual or deferred) backwards from the newest until the
+            viewport at scrollIndex plus one page of overscan is filled. Text items from exactFrom and onwards have
+            exact line counts.
+            Arguments:
+                box                 - The text box.                                         (TextBox)
+                scrollIndex         - The scroll index to fill (None for the current one).  (int)
+        """
+        if box.exactFrom == 0 or box.linesStale or box.linesWidth != box.textWidth:
+            return
+
+        if scrollIndex == None:
+            scrollIndex = box.scrollIndex
+
+        neededLines = box.textHeight * 2 - scrollIndex
+        exactLines = box.lineIndex.get_total() - box.lineIndex.get_prefix_sum(box.exactFrom)
+        changed = False
+        while box.exactFrom > 0 and exactLines < neededLines:
+            box.exactFrom -= 1
+            lineCount = self.__wrap_text_item(box.textItems[box.exactFrom], box.textWidth)
+            if lineCount != box.lineIndex.get_count(box.exactFrom):
+                box.lineIndex.set_count(box.exactFrom, lineCount)
+                box.linesGen += 1
+                changed = True
+            exactLines += lineCount
+
+        # Exact counts can exceed the estimates
+        if changed and box.maxLines != None:
+            self.__trim_lines(box)
+            self.__clamp_scroll_index(box)
+
+
+    def __wrap_deferred_lines(self):
+        """ Idle task, wraps the next deferred text items (estimated, see __update_line_index) of the active setup
+            backwards from exactFrom. Virtual boxes are left estimated. The box is updated once all its text items
+            are wrapped. Returns True if deferred text items remain.
+        """
+        with self.__lock:
+            if self.__activeSetup == None:
+                return False
+
+            for name, box in self.__activeSetup.boxes.items():
+                if box.virtual or box.exactFrom == 0 or box.linesStale or box.linesWidth != box.textWidth:
+                    continue
+
+                deadline = time.perf_counter() + self.__IDLE_STEP_TIME / 1000
+                while box.exactFrom > 0 and time.perf_counter() < deadline:
+                    box.exactFrom -= 1
+                    box.lineIndex.set_count(box.exactFrom,
+                                            self.__wrap_text_item(box.textItems[box.exactFrom], box.textWidth))
+                box.linesGen += 1
+
+                # Exact counts can exceed the estimates
+                if box.maxLines != None:
+                    self.__trim_lines(box)
+                    self.__clamp_scroll_index(box)
+
+                if box.exactFrom == 0:
+                    self.__clamp_scroll_index(box)
+                    self.__bump_box_generation(box)
+                    self.__updateRequested.set()
+                return True
+
+            return False
+
+
+    def __get_lines(self, box, startLine, count):
+        """ Returns count wrapped lines ([line, txtAttr]) of a box starting at a line offset.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+                startLine           - The offset of the first line.         (int)
+                count               - The number of lines.                  (int)
+        """
+        if count <= 0:
+            return list()
+
+        index, subLine = box.lineIndex.find(startLine)
+
+        lines = list()
+        while index < len(box.textItems) and len(lines) < count:
+            item = box.textItems[index]
+            self.__wrap_text_item(item, box.textWidth)
+            lines.extend([line, item.attr] for line in item.get_lines(subLine))
+            subLine = 0
+            index += 1
+
+        return lines[:count]
+
+
+    def __clamp_scroll_index(self, box):
+        """ Clamps the scroll index of a box so that it does not point above the oldest line.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        totalLines = box.lineIndex.get_total()
+        if totalLines >= box.textHeight:
+            box.scrollIndex = min(max(box.scrollIndex, -(totalLines - box.textHeight)), 0)
+        else:
+            box.scrollIndex = 0
+
+
+    def __evict_text_item(self, box):
+        """ Evicts the oldest text item of a box.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        box.textItems.popleft()
+        if len(box.lineIndex) > 0:
+            box.lineIndex.pop_left()
+            box.exactFrom = max(box.exactFrom - 1, 0)
+
+        box.linesGen += 1
+        self.__bump_box_generation(box)
+
+
+    def __trim_lines(self, box):
+        """ Evicts the oldest text items of a box until it has at most maxLines wrapped lines.
+            The newest text item is always kept.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        while box.lineIndex.get_total() > box.maxLines and len(box.textItems) > 1:
+            self.__evict_text_item(box)
+
+
+    def __wrap_text_item(self, item, textWidth):
+        """ Returns the wrapped line count of a text item, wrapping it only if it is wrapped for another width.
+            Arguments:
+                item                - The text item.                        (TextItem)
+                textWidth           - The text width to wrap the item to.   (int)
+        """
+        if item.wrapWidth != textWidth:
+            if item.lineType == LINE_TYPE["single"]:
+                item.truncate(textWidth)
+            else:
+                item.wrap(textWidth)
+
+        return item.get_line_count()
+
+
+    def __update_setup_window(self):
+        """ Clears the window of the active setup, which the frames and scrollbars are drawn to. The window is created
+            with the terminal size.
+        """
+        setup = self.__activeSetup
+        if setup.window == None or setup.window.getmaxyx() != (self.__hTerminal, self.__wTerminal):
+            setup.window = self.__screenBackend.newpad(self.__hTerminal, self.__wTerminal)
+            setup.window.leaveok(True)
+        else:
+            setup.window.erase()
 
 
     def __update_box_frames(self):
-        """ Updates the frames for all the boxes as well as the bottom line that separate input bar from boxes. """
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            if attr["visable"] == False:
+        """ Updates the frames for all the boxes as well as the bottom line that separate input bar from boxes.
+            Returns the number of frames drawn.
+        """
+        drawn = 0
+        window = self.__activeSetup.window
+        for name, box in self.__activeSetup.boxes.items():
+            if box.visable == False:
                 continue
 
-            boxTLX = attr["topLeft"]["x"]
-            boxTLY = attr["topLeft"]["y"]
-            boxBRX = attr["bottomRight"]["x"]
-            boxBRY = attr["bottomRight"]["y"]
-
-            style = self.get_box_frame_char_dict(self.__activeBoxSetup, name)
-
-            if name == self.__boxSetup[self.__activeBoxSetup]["focusedBox"] and self.debug:
-                self.__screen.addstr(boxTLY + 1, boxBRX - 1, "*", curses.color_pair(CHAR_COLOR["red"]))
-
-            for row in range(self.__hTerminal):
-                for column in range(self.__wTerminal):
-                    # DEBUG BOX ON THE TOP OF EVERY BOX
-                    if (boxTLY + 2) == row and boxTLX == column and self.debug and \
-                            self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["top"]:
-                        self.__screen.addstr(row, column, style["verticalRight"], attr["frameAttr"])
-                    elif (boxTLY + 2) == row and boxBRX == column and self.debug and \
-                            self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["top"]:
-                        self.__screen.addstr(row, column, style["verticalLeft"], attr["frameAttr"])
-                    elif (boxTLY + 2) == row and boxTLX < column and boxBRX > column and self.debug and \
-                            self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["top"]:
-                        self.__screen.addstr(row, column, style["horizontal"], attr["frameAttr"])
-
-                    # DEBUG BOX ON THE BOTTOM OF EVERY BOX
-                    elif (boxBRY - 2) == row and boxTLX == column and self.debug and \
-                            self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["bottom"]:
-                        self.__screen.addstr(row, column, style["verticalRight"], attr["frameAttr"])
-                    elif (boxBRY - 2) == row and boxBRX == column and self.debug and \
-                            self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["bottom"]:
-                        self.__screen.addstr(row, column, style["verticalLeft"], attr["frameAttr"])
-                    elif (boxBRY - 2) == row and boxTLX < column and boxBRX > column and self.debug \
-                            and self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["bottom"]:
-                        self.__screen.addstr(row, column, style["horizontal"], attr["frameAttr"])
-
-                    # NORMAL BOX FRAME
-                    elif boxTLY == row and boxTLX == column:
-                        self.__screen.addstr(row, column, style["rightDown"], attr["frameAttr"])
-                    elif boxTLY == row and boxBRX == column:
-                        self.__screen.addstr(row, column, style["leftDown"], attr["frameAttr"])
-                    elif boxBRY == row and boxTLX == column:
-                        self.__screen.addstr(row, column, style["rightUp"], attr["frameAttr"])
-                    elif boxBRY == row and boxBRX == column:
-                        self.__screen.addstr(row, column, style["leftUp"], attr["frameAttr"])
-                    elif (boxTLY == row or boxBRY == row) and boxTLX < column and boxBRX > column:
-                        self.__screen.addstr(row, column, style["horizontal"], attr["frameAttr"])
-                    elif boxTLY < row and boxBRY > row and (boxTLX == column or boxBRX == column):
-                        self.__screen.addstr(row, column, style["vertical"], attr["frameAttr"])
+            frameGen = (box.geometryGen, box.styleGen)
+            if not self.__dirtyAll and box.frameGen == frameGen:
+                continue
+            box.frameGen = frameGen
+            drawn += 1
+
+            boxTLX = box.topLeft["x"]
+            boxTLY = box.topLeft["y"]
+            boxBRX = box.bottomRight["x"]
+            boxBRY = box.bottomRight["y"]
+
+            frame = self.__get_frame_strings(name, box)
+            clip = self.__wTerminal - boxTLX    # Frame columns outside of the terminal are not drawn
+            separatorY = (boxTLY + frame["separatorRow"]) if frame["separatorRow"] != None else None
+
+            for row in range(boxTLY, min(boxBRY + 1, self.__hTerminal)):
+                if row == boxTLY:
+                    window.addstr(row, boxTLX, frame["top"][:clip], box.frameAttr)
+                elif row == boxBRY:
+                    window.addstr(row, boxTLX, frame["bottom"][:clip], box.frameAttr)
+                elif row == separatorY:
+                    window.addstr(row, boxTLX, frame["separator"][:clip], box.frameAttr)
+                else:
+                    window.addstr(row, boxTLX, frame["side"], box.frameAttr)
+                    if boxBRX < self.__wTerminal:
+                        window.addstr(row, boxBRX, frame["side"], box.frameAttr)
+
+            if box is self.__activeSetup.focusedBox and self.debug:
+                window.addstr(boxTLY + 1, boxBRX - 1, "*", self.__merge_attributes("red"))
 
             if self.debug:
                 x = boxTLX + 1
                 y = (boxTLY + 1) if self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["top"] else (boxBRY - 1)
                 if self.dbgBoxInfoShow == DBG_BOX_INFO["name"]:
-                    self.__screen.addstr(y, x, name[:(attr["boxWidth"] - 1 - self.__FRAME_SIZE)])
+                    window.addstr(y, x, name[:(box.boxWidth - 1 - self.__FRAME_SIZE)])
                 elif self.dbgBoxInfoShow == DBG_BOX_INFO["textSize"]:
-                    textSize = f'txt: w = {attr["textWidth"]}, h = {attr["textHeight"]}'
-                    self.__screen.addstr(y, x, textSize[:(attr["boxWidth"] - 1 - self.__FRAME_SIZE)])
+                    textSize = f'txt: w = {box.textWidth}, h = {box.textHeight}'
+                    window.addstr(y, x, textSize[:(box.boxWidth - 1 - self.__FRAME_SIZE)])
                 elif self.dbgBoxInfoShow == DBG_BOX_INFO["boxSize"]:
-                    boxSize = f'box: w = {attr["boxWidth"]}, h = {attr["boxHeight"]}'
-                    self.__screen.addstr(y, x, boxSize[:(attr["boxWidth"] - 1 - self.__FRAME_SIZE)])
+                    boxSize = f'box: w = {box.boxWidth}, h = {box.boxHeight}'
+                    window.addstr(y, x, boxSize[:(box.boxWidth - 1 - self.__FRAME_SIZE)])
 
-        if not self.__infoPromptActive:
-            self.__reset_info_prompt()
-        else:
-            self.set_info_prompt_text(self.__infoPromptCurrText)
+        return drawn
+
+
+    def __get_frame_strings(self, name, box):
+        """ Returns the precompiled frame rows of a box, compiling them on the first use of its geometry.
+            Arguments:
+                name                - The name of the text box.             (str)
+                box                 - The text box.                         (TextBox)
+        """
+        key = (box.boxWidth, box.boxHeight, box.frameChar, self.debug, self.dbgBoxPlacementShow)
+        if key in self.__frameCache:
+            return self.__frameCache[key]
+
+        style = self.get_box_frame_char_dict(self.__activeSetup.name, name)
+        innerWidth = box.boxWidth - 2
+
+        # Row offset of the debug separator from the top of the box (None if not shown)
+        separatorRow = None
+        if self.debug and self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["top"]:
+            separatorRow = 2
+        elif self.debug and self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["bottom"]:
+            separatorRow = box.boxHeight - 3
+
+        frame = {
+            "top"                   : style["rightDown"] + style["horizontal"] * innerWidth + style["leftDown"],
+            "bottom"                : style["rightUp"] + style["horizontal"] * innerWidth + style["leftUp"],
+            "separator"             : style["verticalRight"] + style["horizontal"] * innerWidth + style["verticalLeft"],
+            "separatorRow"          : separatorRow,
+            "side"                  : style["vertical"]
+        }
+        self.__frameCache[key] = frame
+
+        return frame
+
+
+    def __update_info_prompt(self):
+        """ Updates the info prompt line that separate the prompt from the boxes. """
+        self.__dirtyInfoPrompt = False
+
+        # Text without timeout is shown during one update only
+        if not self.__infoPromptActive and not self.__infoPromptPending:
+            self.__infoPromptCurrText = ""
+        self.__infoPromptPending = False
+
+        infoPromptY = self.__hTerminal - 1 - self.__promptHeight
+        bgAttr = self.__merge_attributes(self.__infoPromptCharAttr)
+        self.__screen.addstr(infoPromptY, 0, self.__wTerminal * self.__infoPromptChar, bgAttr)
+
+        if self.__infoPromptCurrText != "":
+            textStartX = self.__infoPromptTextIndent + 1
+            textMaxLen = self.__wTerminal - (self.__infoPromptTextIndent * 2) - 2
+            textEndX = textStartX + len(self.__infoPromptCurrText[:textMaxLen])
+            textAttr = self.__merge_attributes(self.__infoPromptTextAttr)
+
+            self.__screen.addstr(infoPromptY, self.__infoPromptTextIndent, " ", bgAttr)
+            self.__screen.addstr(infoPromptY, textStartX, self.__infoPromptCurrText[:textMaxLen], textAttr)
+            self.__screen.addstr(infoPromptY, textEndX, " ", bgAttr)
 
 
     def __update_prompt(self):
         """ Updates the prompt. """
+        self.__dirtyPrompt = False
+
         self.__promptVLeftPos = self.__promptCursorPos - self.__promptVCursorPos
         self.__promptVRightPos = self.__promptVLeftPos + self.__promptLineWidth
 
@@ -689,64 +1293,235 @@ class TerminalTextBoxes():
             self.__screen.addstr(self.__hTerminal - self.__promptHeight - i, 0, txt)
 
         displayedString = ""
-        if len(self.__promptString) >= self.__promptLineWidth:
-            displayedString = self.__promptString[self.__promptVLeftPos:self.__promptVRightPos]
+        if len(self.__prompt) >= self.__promptLineWidth:
+            displayedString = self.__prompt.get_slice(self.__promptVLeftPos, self.__promptVRightPos)
         else:
-            displayedString = self.__promptString
+            displayedString = self.__prompt.get_string()
         self.__screen.addstr(self.__hTerminal - self.__promptHeight, 0, self.__promptSign + displayedString)
 
 
-    def __update_boxes(self):
-        """ Updates all the boxes. """
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            if attr["visable"] == False:
+    def __update_boxes(self, stats=None, perfInfo=False):
+        """ Updates all the boxes.
+            Arguments:
+                stats               - Render stats to record the time per box in.   (RenderStats)
+                perfInfo            - Record the render time for the performance info.  (bool)
+        """
+        for name, box in self.__activeSetup.boxes.items():
+            if box.visable == False:
                 continue
 
-            displayedText = list()
-            if len(attr["lines"]) >= attr["textHeight"]:
-                displayedText = attr["lines"][-attr["textHeight"] + attr["scrollIndex"]:][:attr["textHeight"]]
-            else:
-                displayedText = attr["lines"]
+            bodyGen = (box.contentGen, box.geometryGen)
+            if not self.__dirtyAll and box.bodyGen == bodyGen:
+                continue
+            box.bodyGen = bodyGen
+
+            if stats != None or perfInfo:
+                start = time.perf_counter()
+
+            self.__update_box_pad(box)
+
+            if stats != None:
+                stats.add_box_time(name, "boxes", time.perf_counter() - start)
+            if perfInfo:
+                box.perfRenderTime = time.perf_counter() - start
+                box.perfRenderTimes.append(time.monotonic())
+
+
+    def __update_box_pad(self, box):
+        """ Updates the pad that holds the text area of a box. The pad keeps the displayed lines, the page above them
+            and room for the page below them, so scrolling within it only moves the viewport and new lines at the
+            bottom are the only ones drawn. The pad is redrawn when its lines are renumbered (text items removed,
+            evicted or re-wrapped) or the viewport leaves it.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        # A very small terminal can leave the text area without rows or columns, there is nothing to draw
+        if box.textHeight <= 0 or box.textWidth <= 0:
+            box.pad = None
+            return
+
+        padHeight = box.textHeight * self.__PAD_PAGES
+
+        # One column more than the text width, a full line on the last row would otherwise not fit
+        if box.pad == None or box.padKey == None or box.padKey[1] != box.geometryGen:
+            box.pad = self.__screenBackend.newpad(padHeight, box.textWidth + 1)
+            box.pad.leaveok(True)
+            box.padKey = None
+
+        totalLines = box.lineIndex.get_total()
+        startLine = max(totalLines - box.textHeight + box.scrollIndex, 0)
+        endLine = min(startLine + box.textHeight, totalLines)
+
+        padKey = (box.linesGen, box.geometryGen)
+        if box.padKey != padKey or startLine < box.padStart or endLine > box.padStart + padHeight:
+            box.pad.erase()
+            box.padStart = max(startLine - box.textHeight, 0)
+            box.padEnd = box.padStart
+            box.padKey = padKey
+
+        # Draw the lines that the pad is missing
+        for i, line in enumerate(self.__get_lines(box, box.padEnd, endLine - box.padEnd)):
+            box.pad.addstr(box.padEnd - box.padStart + i, 0, line[0], line[1])
+        box.padEnd = max(box.padEnd, endLine)
+
+        box.padRow = startLine - box.padStart
+        box.padChanged = True
+
+
+    def __refresh_setup_window(self, touchAll):
+        """ Copies the active setup window to the screen, after the screen window itself.
+            Arguments:
+                touchAll            - Copy the whole box area, otherwise only the regions drawn.    (bool)
+        """
+        window = self.__activeSetup.window
+        if touchAll:
+            self.__windowRegions = [(0, 0, self.__hTerminal - (self.__promptHeight + self.__FRAME_SIZE) - 1,
+                                     self.__wTerminal - 1)]
+
+        window.touchwin()
+        for y, x, maxY, maxX in self.__windowRegions:
+            # The scrollbar of a text area without rows has no region
+            if maxY < y or maxX < x:
+                continue
+            window.noutrefresh(y, x, y, x, maxY, maxX)
+        self.__windowRegions.clear()
+
+
+    def __refresh_box_pads(self, touchAll):
+        """ Copies the viewport of the box pads to the screen, after the screen and setup windows.
+            Arguments:
+                touchAll            - The screen window was drawn over the text areas, copy all viewports.  (bool)
+        """
+        for name, box in self.__activeSetup.boxes.items():
+            if box.visable == False or box.pad == None:
+                continue
+
+            if not (touchAll or box.padChanged):
+                continue
+            box.padChanged = False
 
-            for i, line in enumerate(displayedText):
-                self.__screen.addstr(attr["textStartY"] + i, attr["textStartX"], line[0], line[1])
+            maxY = min(box.textStartY + box.textHeight, self.__hTerminal) - 1
+            maxX = min(box.textStartX + box.textWidth, self.__wTerminal) - 1
+            if maxY < box.textStartY or maxX < box.textStartX:
+                continue
+
+            box.pad.touchwin()
+            box.pad.noutrefresh(box.padRow, 0, box.textStartY, box.textStartX, maxY, maxX)
 
 
     def __update_boxes_scrolls(self):
         """ Updates the scroll wheel for all boxes. """
-        for name, attr in self.__boxSetup[self.__activeBoxSetup]["boxes"].items():
-            if attr["visable"] == False:
+        window = self.__activeSetup.window
+        for name, box in self.__activeSetup.boxes.items():
+            if box.visable == False:
                 continue
 
-            if not attr["scrollVisable"]:
+            if not box.scrollVisable:
                 continue
 
-            scrollBoundary = attr["textHeight"] + (attr["hTextIndent"] * 2)
+            scrollGen = (box.contentGen, box.geometryGen, box.styleGen, box.linesGen)
+            if not self.__dirtyAll and box.scrollGen == scrollGen:
+                continue
+            box.scrollGen = scrollGen
+
+            scrollBoundary = box.textHeight + (box.hTextIndent * 2)
+            boundaryStart = box.textStartY - box.hTextIndent
+            self.__windowRegions.append((boundaryStart, box.bottomRight["x"], boundaryStart + scrollBoundary - 1,
+                                         box.bottomRight["x"]))
+
+            # Restore the frame edge underneath the previous scrollbar
+            if not self.__dirtyAll:
+                style = self.get_box_frame_char_dict(self.__activeSetup.name, name)
+                for row in range(boundaryStart, boundaryStart + scrollBoundary):
+                    window.addstr(row, box.bottomRight["x"], style["vertical"], box.frameAttr)
 
-            if len(attr["lines"]) >= attr["textHeight"]:
-                boundaryStart = attr["textStartY"] - attr["hTextIndent"]
-                boundaryEnd = attr["textStartY"] + attr["textHeight"] + attr["hTextIndent"]
+            totalLines = box.lineIndex.get_total()
 
-                below = -attr["scrollIndex"] if attr["scrollIndex"] < 0 else 0
-                above = len(attr["lines"]) - (below + attr["textHeight"])
+            if totalLines >= box.textHeight and totalLines > 0:
+                boundaryEnd = box.textStartY + box.textHeight + box.hTextIndent
 
-                startY = int(scrollBoundary * (above / len(attr["lines"]))) + boundaryStart
-                endY = boundaryEnd - int(scrollBoundary * (below / len(attr["lines"])))
+                below = -box.scrollIndex if box.scrollIndex < 0 else 0
+                above = totalLines - (below + box.textHeight)
+
+                startY = int(scrollBoundary * (above / totalLines)) + boundaryStart
+                endY = boundaryEnd - int(scrollBoundary * (below / totalLines))
 
                 for row in range(startY, endY):
-                    self.__screen.addstr(row, attr["bottomRight"]["x"], attr["scrollChar"], attr["frameAttr"])
+                    window.addstr(row, box.bottomRight["x"], box.scrollChar, box.frameAttr)
+
+
+    def __update_performance_info(self):
+        """ Updates the live performance info (DBG_BOX_INFO["performance"]). Every box shows how many times per second
+            its text area is drawn, how long the last draw took, its number of text items and wrapped lines and an
+            estimate of its memory use. The info prompt line shows the updates per second and the input to paint
+            latency of the last key press.
+        """
+        now = time.monotonic()
+
+        for name, box in self.__activeSetup.boxes.items():
+            if box.visable == False:
+                continue
+
+            fps = sum(1 for renderTime in box.perfRenderTimes if renderTime > now - 1)
+            info = f'{fps} fps, {box.perfRenderTime * 1000:.2f} ms, {len(box.textItems)} items, ' \
+                   f'{box.lineIndex.get_total()} lines, {self.__estimate_box_memory(box) / 2**20:.1f} MB'
+
+            # The last column is left for the focus indicator
+            x = box.topLeft["x"] + self.__FRAME_SIZE
+            y = box.topLeft["y"] + 1
+            if self.dbgBoxPlacementShow == DBG_BOX_PLACEMENT["bottom"]:
+                y = box.bottomRight["y"] - 1
+            width = min(box.boxWidth - 2 * self.__FRAME_SIZE - 1, self.__wTerminal - x)
+            if width > 0 and y < self.__hTerminal - self.__promptHeight - 1:
+                self.__activeSetup.window.addstr(y, x, f"{info:<{width}}"[:width])
+                self.__windowRegions.append((y, x, y, x + width - 1))
+
+        fps = sum(1 for renderTime in self.__renderTimes if renderTime > now - 1)
+        latency = f"{self.__inputLatency * 1000:.2f} ms" if self.__inputLatency != None else "-"
+        info = f" {fps} fps, input to paint {latency} "
+        infoX = self.__wTerminal - self.__infoPromptTextIndent - len(info)
+        if infoX > 0:
+            self.__screen.addstr(self.__hTerminal - 1 - self.__promptHeight, infoX, info)
+
+
+    def __estimate_box_memory(self, box):
+        """ Returns an estimate of the memory (bytes) used by the text items and wrapped lines of a box, based on a
+            sample of its newest text items.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        length = len(box.textItems)
+        if length == 0:
+            return 0
+
+        sample = list(islice(box.textItems, max(length - 64, 0), None))
+        sampleSize = 0
+        for item in sample:
+            sampleSize += sys.getsizeof(item) + sys.getsizeof(item.text)
+            if item.spans != None:
+                sampleSize += sys.getsizeof(item.spans)
+            if item.wrapText != None:
+                sampleSize += sys.getsizeof(item.wrapText)
+
+        # Line index counts and tree, deque slot
+        return sampleSize * length // len(sample) + length * (8 * 3)
 
 
     def __update_visual_cursor(self):
         """ Updates the visual cursor in the prompt. """
-        self.__screen.move(self.__hTerminal - self.__promptHeight, self.__promptVCursorPos + len(self.__promptSign))
+        self.__screen.move(*self.__get_visual_cursor_pos())
+
+
+    def __get_visual_cursor_pos(self):
+        """ Returns the position (y, x) of the visual cursor in the prompt. """
+        return self.__hTerminal - self.__promptHeight, self.__promptVCursorPos + len(self.__promptSign)
 
 
     def __update_boxes_frame_attr(self):
         """ Updates all the boxes frame attributes from unmerged to merged. """
-        for setupName, setupAttr in self.__boxSetup.items():
-            for boxName, boxAttr in setupAttr["boxes"].items():
-                boxAttr["frameAttr"] = self.__merge_attributes(boxAttr["frameAttrUnmerged"])
+        for setup in self.__boxSetup.values():
+            for box in setup.boxes.values():
+                box.frameAttr = self.__merge_attributes(box.frameAttrUnmerged)
 
 
     ###################################################################################################################
@@ -765,14 +1540,17 @@ class TerminalTextBoxes():
         """
         self.__is_type(sign, str)
 
-        self.__promptSign = sign
-        self.__promptSignSize = len(self.__promptSign)
-        self.__PROMPT_MIN_WIDTH = self.__promptSignSize + 10
+        with self.__lock:
+            self.__promptSign = sign
+            self.__promptSignSize = len(self.__promptSign)
+            self.__PROMPT_MIN_WIDTH = self.__promptSignSize + 10
+            self.__layoutVersion += 1
+            self.__dirtyPrompt = True
 
 
     def get_prompt_string(self):
         """ Get the prompt string. """
-        return self.__promptString
+        return self.__prompt.get_string()
 
 
     def set_prompt_string(self, string):
@@ -782,13 +1560,15 @@ class TerminalTextBoxes():
         """
         self.__is_type(string, str)
 
-        self.__promptString = string
+        with self.__lock:
+            self.__prompt.set_string(string)
 
-        self.__promptCursorPos = len(string)
-        if self.__promptCursorPos >= self.__promptLineWidth:
-            self.__promptVCursorPos = self.__promptLineWidth
-        else:
-            self.__promptVCursorPos = len(string)
+            self.__promptCursorPos = len(string)
+            if self.__promptCursorPos >= self.__promptLineWidth:
+                self.__promptVCursorPos = self.__promptLineWidth
+            else:
+                self.__promptVCursorPos = len(string)
+            self.__dirtyPrompt = True
 
 
     def get_prompt_cursor_pos(self):
@@ -810,7 +1590,9 @@ class TerminalTextBoxes():
         if len(char) != 1:
             raise Exception("Char can only be of length 1.")
 
-        self.__infoPromptChar = char
+        with self.__lock:
+            self.__infoPromptChar = char
+            self.__dirtyInfoPrompt = True
 
 
     def get_info_prompt_char_attr(self):
@@ -825,7 +1607,9 @@ class TerminalTextBoxes():
         """
         self.__check_attributes_valid(attributes)
 
-        self.__infoPromptCharAttr = attributes
+        with self.__lock:
+            self.__infoPromptCharAttr = attributes
+            self.__dirtyInfoPrompt = True
 
 
     def get_info_prompt_text_attr(self):
@@ -840,7 +1624,9 @@ class TerminalTextBoxes():
         """
         self.__check_attributes_valid(attributes)
 
-        self.__infoPromptTextAttr = attributes
+        with self.__lock:
+            self.__infoPromptTextAttr = attributes
+            self.__dirtyInfoPrompt = True
 
 
     def get_info_prompt_text_indent(self):
@@ -853,12 +1639,15 @@ class TerminalTextBoxes():
             Arguments:
                 indent          - The indentation of the info prompt text.      (int)
         """
-        self.__is_type(char, int)
+        self.__is_type(indent, int)
         if indent < 0:
             raise Exception("indent can't be lower than 0.")
 
-        self.__infoPromptTextIndent = indent
-        self.__INFO_PROMPT_MIN_WIDTH = self.__infoPromptTextIndent * 2 + (2 + 5)
+        with self.__lock:
+            self.__infoPromptTextIndent = indent
+            self.__INFO_PROMPT_MIN_WIDTH = self.__infoPromptTextIndent * 2 + (2 + 5)
+            self.__layoutVersion += 1
+            self.__dirtyInfoPrompt = True
 
 
     def get_box_width(self, setupName, boxName):
@@ -869,7 +1658,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["fixedWidth"]
+        return self.__boxSetup[setupName].boxes[boxName].fixedWidth
 
 
     def set_box_width(self, setupName, boxName, width):
@@ -883,7 +1672,9 @@ class TerminalTextBoxes():
 
         self.__is_type(width, int)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["fixedWidth"] = width
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].fixedWidth = width
+            self.__layoutVersion += 1
 
 
     def get_box_height(self, setupName, boxName):
@@ -894,7 +1685,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["fixedHeight"]
+        return self.__boxSetup[setupName].boxes[boxName].fixedHeight
 
 
     def set_box_height(self, setupName, boxName, height):
@@ -908,7 +1699,9 @@ class TerminalTextBoxes():
 
         self.__is_type(height, int)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["fixedHeight"] = height
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].fixedHeight = height
+            self.__layoutVersion += 1
 
 
     def get_box_horizontal_orient(self, setupName, boxName):
@@ -919,7 +1712,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["hOrient"]
+        return self.__boxSetup[setupName].boxes[boxName].hOrient
 
 
     def set_box_horizontal_orient(self, setupName, boxName,  orient):
@@ -934,7 +1727,9 @@ class TerminalTextBoxes():
         if not isinstance(orient, int) or orient not in H_ORIENT.values():
             raise Exception("orient is not of integer type or not within acceptable range.")
 
-        self.__boxSetup[setupName]["boxes"][boxName]["hOrient"] = orient
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].hOrient = orient
+            self.__layoutVersion += 1
 
 
     def get_box_vertical_orient(self, setupName, boxName):
@@ -945,7 +1740,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["vOrient"]
+        return self.__boxSetup[setupName].boxes[boxName].vOrient
 
 
     def set_box_vertical_orient(self, setupName, boxName, orient):
@@ -960,7 +1755,9 @@ class TerminalTextBoxes():
         if not isinstance(orient, int) or orient not in V_ORIENT.values():
             raise Exception("orient is not of integer type or not within acceptable range.")
 
-        self.__boxSetup[setupName]["boxes"][boxName]["vOrient"] = orient
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].vOrient = orient
+            self.__layoutVersion += 1
 
 
     def get_box_text_width_indent(self, setupName, boxName):
@@ -971,7 +1768,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["wTextIndent"]
+        return self.__boxSetup[setupName].boxes[boxName].wTextIndent
 
 
     def set_box_text_width_indent(self, setupName, boxName, indent):
@@ -984,7 +1781,9 @@ class TerminalTextBoxes():
         self.__check_text_box_valid(setupName, boxName)
         self.__is_type(indent, int)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["wTextIndent"] = indent
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].wTextIndent = indent
+            self.__layoutVersion += 1
 
 
     def get_box_text_height_indent(self, setupName, boxName):
@@ -995,7 +1794,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["hTextIndent"]
+        return self.__boxSetup[setupName].boxes[boxName].hTextIndent
 
 
     def set_box_text_height_indent(self, setupName, boxName, indent):
@@ -1008,7 +1807,9 @@ class TerminalTextBoxes():
         self.__check_text_box_valid(setupName, boxName)
         self.__is_type(indent, int)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["hTextIndent"] = indent
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].hTextIndent = indent
+            self.__layoutVersion += 1
 
 
     def get_box_frame_char(self, setupName, boxName):
@@ -1019,7 +1820,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["frameChar"]
+        return self.__boxSetup[setupName].boxes[boxName].frameChar
 
 
     def get_box_frame_char_dict(self, setupName, boxName):
@@ -1030,7 +1831,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        style = self.__boxSetup[setupName]["boxes"][boxName]["frameChar"]
+        style = self.__boxSetup[setupName].boxes[boxName].frameChar
 
         frame = {
             "vertical"              : FRAME_STYLE[style][0],
@@ -1062,7 +1863,10 @@ class TerminalTextBoxes():
         if char not in FRAME_STYLE:
             raise Exception(f"{char} is not in FRAME_STYLE.")
 
-        self.__boxSetup[setupName]["boxes"][boxName]["frameChar"] = char
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].frameChar = char
+            self.__layoutVersion += 1
+            self.__bump_box_generation(self.__boxSetup[setupName].boxes[boxName], False, True)
 
 
     def get_box_frame_attr(self, setupName, boxName):
@@ -1073,7 +1877,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["frameAttrUnmerged"]
+        return self.__boxSetup[setupName].boxes[boxName].frameAttrUnmerged
 
 
     def set_box_frame_attr(self, setupName, boxName, attributes):
@@ -1086,9 +1890,11 @@ class TerminalTextBoxes():
         self.__check_text_box_valid(setupName, boxName)
         self.__check_attributes_valid(attributes)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["frameAttrUnmerged"] = attributes
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].frameAttrUnmerged = attributes
 
-        self.__update_boxes_frame_attr()
+            self.__update_boxes_frame_attr()
+            self.__bump_box_generation(self.__boxSetup[setupName].boxes[boxName], False, True)
 
 
     def get_box_visable(self, setupName, boxName):
@@ -1099,7 +1905,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["visable"]
+        return self.__boxSetup[setupName].boxes[boxName].visable
 
 
     def set_box_visable(self, setupName, boxName, visable):
@@ -1112,7 +1918,10 @@ class TerminalTextBoxes():
         self.__check_text_box_valid(setupName, boxName)
         self.__is_type(visable, bool)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["visable"] = visable
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].visable = visable
+            self.__layoutVersion += 1
+            self.__boxSetup[setupName].paintKey = None
 
 
     def get_box_horizontal_pos(self, setupName, boxName):
@@ -1123,7 +1932,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxOrder"].index(boxName)
+        return self.__boxSetup[setupName].boxOrder.index(boxName)
 
 
     def set_box_horizontal_pos(self, setupName, boxName, pos):
@@ -1136,10 +1945,12 @@ class TerminalTextBoxes():
         self.__check_text_box_valid(setupName, boxName)
         self.__is_type(pos, int)
 
-        self.__boxSetup[setupName]["boxOrder"].pop(self.__boxSetup[setupName]["boxOrder"].index(boxName))
-        self.__boxSetup[setupName]["boxOrder"].insert(pos, boxName)
-        self.__boxSetup[setupName]["boxes"] = \
-                {key : self.__boxSetup[setupName]["boxes"][key] for key in self.__boxSetup[setupName]["boxOrder"]}
+        with self.__lock:
+            self.__boxSetup[setupName].boxOrder.pop(self.__boxSetup[setupName].boxOrder.index(boxName))
+            self.__boxSetup[setupName].boxOrder.insert(pos, boxName)
+            self.__boxSetup[setupName].boxes = \
+                    {key : self.__boxSetup[setupName].boxes[key] for key in self.__boxSetup[setupName].boxOrder}
+            self.__layoutVersion += 1
 
 
     def get_box_vertical_pos(self, setupName, boxName):
@@ -1166,13 +1977,15 @@ class TerminalTextBoxes():
 
 
     def set_active_box_setup(self, setupName):
-        """ Set the active box setup.
+        """ Set the active box setup. A setup that was shown before at the same terminal size is painted from its
+            cached layout, window and box pads.
             Arguments:
                 setupName           - The name of the box setup.            (str)
         """
         self.__check_box_setup_valid(setupName)
 
-        self.__activeBoxSetup = setupName
+        with self.__lock:
+            self.__activeSetup = self.__boxSetup[setupName]
 
 
     def set_focus_box(self, setupName, boxName):
@@ -1183,10 +1996,12 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        if self.__boxSetup[setupName]["boxes"][boxName]["visable"] == False:
+        if self.__boxSetup[setupName].boxes[boxName].visable == False:
             raise Exception(f"Can not set focus on an invisible box.")
 
-        self.__boxSetup[setupName]["focusedBox"] = boxName
+        with self.__lock:
+            self.__boxSetup[setupName].focusedBox = self.__boxSetup[setupName].boxes[boxName]
+            self.__boxSetup[setupName].paintKey = None
 
 
     def get_box_scroll_visable(self, setupName, boxName):
@@ -1197,7 +2012,7 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        return self.__boxSetup[setupName]["boxes"][boxName]["scrollVisable"]
+        return self.__boxSetup[setupName].boxes[boxName].scrollVisable
 
 
     def set_box_scroll_visable(self, setupName, boxName, visable):
@@ -1209,7 +2024,9 @@ class TerminalTextBoxes():
         """
         self.__check_text_box_valid(setupName, boxName)
 
-        self.__boxSetup[setupName]["boxes"][boxName]["scrollVisable"] = visable
+        with self.__lock:
+            self.__boxSetup[setupName].boxes[boxName].scrollVisable = visable
+            self.__bump_box_generation(self.__boxSetup[setupName].boxes[boxName], False, True)
 
 
     def set_prompt_char_callback_function(self, function):
@@ -1217,7 +2034,8 @@ class TerminalTextBoxes():
             Arguments:
                 function            - The callback function.        (Function)
         """
-        self.__promptCharCallbackFunction = function
+        with self.__lock:
+            self.__promptCharCallbackFunction = function
 
 
     def set_prompt_callback_function(self, function):
@@ -1225,7 +2043,64 @@ class TerminalTextBoxes():
             Arguments:
                 function            - The callback function.        (Function)
         """
-        self.__promptEnterCallbackFunction = function
+        with self.__lock:
+            self.__promptEnterCallbackFunction = function
+
+
+    def get_render_stats(self):
+        """ Get the update statistics, None if disabled (see set_render_stats). Contains the number of updates and
+            the calls, total time and rolling p50/p95/p99 (s) of every update stage and of every box.
+        """
+        with self.__lock:
+            if self.__renderStats == None:
+                return None
+            return self.__renderStats.get_stats()
+
+
+    def set_render_stats(self, enabled, windowSize=1000):
+        """ Enables/Disables recording the time of every update stage. Enabling resets the statistics.
+            Arguments:
+                enabled             - Should the update stages be timed.                (bool)
+                windowSize          - Number of recent updates used for percentiles.    (int)
+        """
+        self.__is_type(enabled, bool)
+        self.__is_type(windowSize, int)
+        if windowSize < 1:
+            raise Exception("windowSize must be bigger than 0.")
+
+        with self.__lock:
+            callback = self.__renderStats.callback if self.__renderStats != None else None
+            self.__renderStats = RenderStats(windowSize, callback) if enabled else None
+
+
+    def set_render_stats_callback_function(self, function):
+        """ Set the function called with the stage times of every update (Only while render stats are enabled).
+            Arguments:
+                function            - The callback function.        (Function)
+        """
+        with self.__lock:
+            if self.__renderStats == None:
+                raise Exception("Render stats are not enabled, run set_render_stats(True) first.")
+            self.__renderStats.callback = function
+
+
+    def get_max_fps(self):
+        """ Get the max number of requested updates per second. """
+        return self.__maxFps
+
+
+    def set_max_fps(self, fps):
+        """ Set the max number of requested updates per second (Key presses are always updated immediately).
+            Arguments:
+                fps                 - Updates per second, None for no cap.     (int/float/None)
+        """
+        if fps != None:
+            self.__is_type(fps, (int, float))
+            if fps <= 0:
+                raise Exception("fps must be bigger than 0.")
+
+        with self.__lock:
+            self.__maxFps = fps
 
 
     ###################################################################################################################
@@ -1237,141 +2112,283 @@ class TerminalTextBoxes():
             Arguments:
                 event           - Event argument (Not used).
         """
+        idleWork = False    # Deferred text items are left to wrap, keep polling without waiting
         while True:
-            char = self.__screen.get_wch()
-
-            focusedBox = self.__boxSetup[self.__activeBoxSetup]["focusedBox"]
+            # Wait for a key, but not past the time when a requested update is due
+            updatePending = self.__updateRequested.is_set() or len(self.__textItemQueue) != 0
+            if updatePending:
+                self.__screen.timeout(int(self.__get_render_wait() * 1000) + 1)
+            elif idleWork:
+                self.__screen.timeout(0)
+            else:
+                self.__screen.timeout(self.__INPUT_POLL_TIMEOUT)
+
+            try:
+                char = self.__get_key()
+            except curses.error:
+                # No key within the timeout
+                if not self.__isActive:
+                    break
+                if updatePending and self.__get_render_wait() == 0:
+                    self.__render()
+                elif not updatePending:
+                    idleWork = self.__wrap_deferred_lines()
+                continue
 
-            # GENERAL KEY EVENTS --------------------------------------------------------------------------------------
-            if char == "\x1b":                  # <ESC> KEY (Exit)
-                if self.__promptCharCallbackFunction != None:
-                    self.__promptCharCallbackFunction(char)
+            if not self.__handle_keys(char):
                 break
 
-            elif char == "\x00":                # "WINDOWS" KEY
-                pass
+        self.__screenBackend.set_bracketed_paste(False)
+        self.__screenBackend.stop() # Close curses terminal (Nothing for a virtual screen)
 
-            elif char == curses.KEY_RESIZE:     # RESIZE EVENT
-                self.__promptCursorPos = 0
-                self.__promptVCursorPos = 0
 
-                if self.__resizeDone:
-                    self.__screen.clear()
+    def __handle_keys(self, char):
+        """ Handles a key and every key that is available right away after it (e.g. key repeat), then updates the
+            screen once. Returns False if the key handler should exit.
+            Arguments:
+                char            - The first key.
+        """
+        inputTime = time.perf_counter()
 
-                self.__resizeDone = False
-                self.__resizeTimer.cancel()
-                self.__resizeTimer = threading.Timer(.1, self.__resize_timeout)
-                self.__resizeTimer.start()
+        with self.__lock:
+            keepRunning = self.__handle_key(char)
+            while keepRunning:
+                char = self.__get_available_key()
+                if char == None:
+                    break
+                keepRunning = self.__handle_key(char)
 
+            # Key presses bypass the fps cap to keep the echo latency low
+            if keepRunning:
+                self.__render()
+                self.__inputLatency = time.perf_counter() - inputTime
 
-            # PROMPT KEY EVENTS ---------------------------------------------------------------------------------------
-            elif char == 260:                   # <ARROW-LEFT> KEY (Scroll left)
-                if self.__promptVCursorPos != 0:
-                    self.__promptVCursorPos -= 1
-                if self.__promptCursorPos != 0:
-                    self.__promptCursorPos -= 1
+        return keepRunning
 
-            elif char == 261:                   # <ARROW-RIGHT> KEY (Scroll right)
-                if self.__promptVCursorPos < len(self.__promptString) and \
-                   self.__promptVCursorPos != self.__promptLineWidth:
-                    self.__promptVCursorPos += 1
-                if self.__promptCursorPos < len(self.__promptString):
-                    self.__promptCursorPos += 1
 
-            elif char == 262:                   # HOME KEY
-                self.__promptVCursorPos = 0
-                self.__promptCursorPos = 0
+    def __handle_key(self, char):
+        """ Applies a key press to the prompt and box states. Returns False if the key handler should exit.
+            Arguments:
+                char            - The key.
+        """
+        paste = None
+        if char == "\x1b":
+            paste = self.__get_bracketed_paste()
 
-            elif char == 358 or char == 360:    # END KEY
-                if len(self.__promptString) >= self.__promptLineWidth:
-                    self.__promptVCursorPos = self.__promptLineWidth
-                else:
-                    self.__promptVCursorPos = len(self.__promptString)
-                self.__promptCursorPos = len(self.__promptString)
-
-            elif char == 330:                   # DELETE KEY
-                self.__promptString = self.__promptString[:self.__promptCursorPos] + \
-                    self.__promptString[self.__promptCursorPos:][1:]
-
-                if len(self.__promptString) >= self.__promptLineWidth:
-                    if len(self.__promptString) == (self.__promptVRightPos - 1) and \
-                       self.__promptVCursorPos != self.__promptLineWidth:
-                        self.__promptVCursorPos += 1
-
-            elif char == "\x08" or char == 263 or char == "\x7f": # BACKSPACE KEY
-                self.__promptString = self.__promptString[:self.__promptCursorPos][:-1] + \
-                    self.__promptString[self.__promptCursorPos:]
-
-                if self.__promptVCursorPos != 0 and len(self.__promptString) <= self.__promptLineWidth and \
-                   self.__promptVLeftPos == 0:
-                    self.__promptVCursorPos -= 1
-                elif self.__promptVCursorPos != 0 and len(self.__promptString) >= self.__promptLineWidth and \
-                     self.__promptVLeftPos == 0:
-                    self.__promptVCursorPos -= 1
-                if self.__promptCursorPos != 0:
-                    self.__promptCursorPos -= 1
-
-            elif char == "\x16":                # CTRL + V (paste)
-                copy = self.__get_clipboard()
-                if copy != None and copy != False:
-                    self.__promptString = self.__promptString[:self.__promptCursorPos] + copy + self.__promptString[self.__promptCursorPos:]
-                    self.__promptCursorPos += len(copy)
-                    if (self.__promptVCursorPos + len(copy)) >= self.__promptLineWidth:
-                        self.__promptVCursorPos = self.__promptLineWidth
-                    else:
-                        self.__promptVCursorPos += len(copy)
-
-            elif char == "\n": # <ENTER>
-                if self.__promptString != "" and self.__promptEnterCallbackFunction != None:
-                    self.__promptEnterCallbackFunction(self.__promptString)
-                self.__promptString = ""
-                self.__promptCursorPos = 0
-                self.__promptVCursorPos = 0
-                self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] = 0
-
-
-            # BOX KEY EVENTS ------------------------------------------------------------------------------------------
-            elif char == 259:                   # <ARROW-UP> KEY (Scroll up)
-                lines = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["lines"]
-                scrollIndex = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"]
-                textHeight = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["textHeight"]
-                if len(lines) + scrollIndex > textHeight:
-                    self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] -= 1
-
-            elif char == 258:                   # <ARROW-DOWN> KEY (Scroll down)
-                if self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] != 0:
-                    self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] += 1
-
-            elif char == 339:                   # PAGE UP (Scroll up)
-                lines = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["lines"]
-                textHeight = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["textHeight"]
-                self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] -= textHeight
-                scrollIndex = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"]
-                if scrollIndex < -(len(lines) - textHeight):
-                    self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] = -(len(lines) - textHeight)
-
-            elif char == 338:                   # PAGE DOWN (Scroll down)
-                textHeight = self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["textHeight"]
-                self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] += textHeight
-                if self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] > 0:
-                    self.__boxSetup[self.__activeBoxSetup]["boxes"][focusedBox]["scrollIndex"] = 0
-
-
-            # REGULAR ASCII KEY EVENTS --------------------------------------------------------------------------------
-            else: # Append characters to self.__promptString
-                if isUnicode(char):
-                    self.__promptString =   self.__promptString[:self.__promptCursorPos] + str(char) + \
-                        self.__promptString[self.__promptCursorPos:]
-                    if self.__promptVCursorPos != self.__promptLineWidth:
-                        self.__promptVCursorPos += 1
-                    self.__promptCursorPos += 1
+        focusedBox = self.__activeSetup.focusedBox
+
+        # GENERAL KEY EVENTS -------------------------------------------------------------------------------------------
+        if paste != None:                   # BRACKETED PASTE (Inserted at once)
+            self.__dirtyPrompt = True
+            self.__insert_prompt_text(paste)
+            char = paste                    # The char callback gets the whole paste in one call
 
+        elif char == "\x1b":                # <ESC> KEY (Exit)
             if self.__promptCharCallbackFunction != None:
                 self.__promptCharCallbackFunction(char)
+            return False
+
+        elif char == "\x00":                # "WINDOWS" KEY
+            pass
+
+        elif char == curses.KEY_RESIZE:     # RESIZE EVENT
+            self.__promptCursorPos = 0
+            self.__promptVCursorPos = 0
+
+            if self.__resizeDone:
+                self.__screen.clear()
+
+            self.__dirtyAll = True
+            self.__resizeDone = False
+            self.__resizeTimer.cancel()
+            self.__resizeTimer = threading.Timer(.1, self.__resize_timeout)
+            self.__resizeTimer.start()
+
+
+        # PROMPT KEY EVENTS --------------------------------------------------------------------------------------------
+        elif char == 260:                   # <ARROW-LEFT> KEY (Scroll left)
+            self.__dirtyPrompt = True
+            if self.__promptVCursorPos != 0:
+                self.__promptVCursorPos -= 1
+            if self.__promptCursorPos != 0:
+                self.__promptCursorPos -= 1
+
+        elif char == 261:                   # <ARROW-RIGHT> KEY (Scroll right)
+            self.__dirtyPrompt = True
+            if self.__promptVCursorPos < len(self.__prompt) and \
+               self.__promptVCursorPos != self.__promptLineWidth:
+                self.__promptVCursorPos += 1
+            if self.__promptCursorPos < len(self.__prompt):
+                self.__promptCursorPos += 1
+
+        elif char == 262:                   # HOME KEY
+            self.__dirtyPrompt = True
+            self.__promptVCursorPos = 0
+            self.__promptCursorPos = 0
+
+        elif char == 358 or char == 360:    # END KEY
+            self.__dirtyPrompt = True
+            if len(self.__prompt) >= self.__promptLineWidth:
+                self.__promptVCursorPos = self.__promptLineWidth
+            else:
+                self.__promptVCursorPos = len(self.__prompt)
+            self.__promptCursorPos = len(self.__prompt)
 
-            self.update()
+        elif char == 330:                   # DELETE KEY
+            self.__dirtyPrompt = True
+            self.__prompt.delete(self.__promptCursorPos)
+
+            if len(self.__prompt) >= self.__promptLineWidth:
+                if len(self.__prompt) == (self.__promptVRightPos - 1) and \
+                   self.__promptVCursorPos != self.__promptLineWidth:
+                    self.__promptVCursorPos += 1
+
+        elif char == "\x08" or char == 263 or char == "\x7f": # BACKSPACE KEY
+            self.__dirtyPrompt = True
+            if self.__promptCursorPos != 0:
+                self.__prompt.delete(self.__promptCursorPos - 1)
+
+            if self.__promptVCursorPos != 0 and len(self.__prompt) <= self.__promptLineWidth and \
+               self.__promptVLeftPos == 0:
+                self.__promptVCursorPos -= 1
+            elif self.__promptVCursorPos != 0 and len(self.__prompt) >= self.__promptLineWidth and \
+                 self.__promptVLeftPos == 0:
+                self.__promptVCursorPos -= 1
+            if self.__promptCursorPos != 0:
+                self.__promptCursorPos -= 1
+
+        elif char == "\x16":                # CTRL + V (paste)
+            self.__dirtyPrompt = True
+            copy = self.__get_clipboard()
+            if copy != None and copy != False:
+                self.__insert_prompt_text(copy)
+
+        elif char == "\n": # <ENTER>
+            self.__dirtyPrompt = True
+            if len(self.__prompt) != 0 and self.__promptEnterCallbackFunction != None:
+                self.__promptEnterCallbackFunction(self.__prompt.get_string())
+            self.__prompt.clear()
+            self.__promptCursorPos = 0
+            self.__promptVCursorPos = 0
+            focusedBox.scrollIndex = 0
+            self.__bump_box_generation(focusedBox)
+
+
+        # BOX KEY EVENTS -----------------------------------------------------------------------------------------------
+        elif char == 259:                   # <ARROW-UP> KEY (Scroll up)
+            self.__bump_box_generation(focusedBox)
+            scrollIndex = focusedBox.scrollIndex
+            textHeight = focusedBox.textHeight
+            self.__materialize_lines(focusedBox, scrollIndex - 1)
+            totalLines = focusedBox.lineIndex.get_total()
+            if totalLines + scrollIndex > textHeight:
+                focusedBox.scrollIndex -= 1
+
+        elif char == 258:                   # <ARROW-DOWN> KEY (Scroll down)
+            self.__bump_box_generation(focusedBox)
+            if focusedBox.scrollIndex != 0:
+                focusedBox.scrollIndex += 1
+
+        elif char == 339:                   # PAGE UP (Scroll up)
+            self.__bump_box_generation(focusedBox)
+            textHeight = focusedBox.textHeight
+            focusedBox.scrollIndex -= textHeight
+            scrollIndex = focusedBox.scrollIndex
+            self.__materialize_lines(focusedBox, scrollIndex)
+            totalLines = focusedBox.lineIndex.get_total()
+            if scrollIndex < min(-(totalLines - textHeight), 0):
+                focusedBox.scrollIndex = min(-(totalLines - textHeight), 0)
+
+        elif char == 338:                   # PAGE DOWN (Scroll down)
+            self.__bump_box_generation(focusedBox)
+            textHeight = focusedBox.textHeight
+            focusedBox.scrollIndex += textHeight
+            if focusedBox.scrollIndex > 0:
+                focusedBox.scrollIndex = 0
+
+
+        # REGULAR ASCII KEY EVENTS -------------------------------------------------------------------------------------
+        else: # Insert characters into the prompt
+            if isUnicode(char):
+                self.__dirtyPrompt = True
+                self.__insert_prompt_text(char)
+
+        if self.__promptCharCallbackFunction != None:
+            self.__promptCharCallbackFunction(char)
+
+        # The visible prompt window is used by the next key before the prompt is updated
+        self.__promptVLeftPos = self.__promptCursorPos - self.__promptVCursorPos
+        self.__promptVRightPos = self.__promptVLeftPos + self.__promptLineWidth
+
+        return True
+
+
+    def __get_key(self):
+        """ Returns the next key, keys that were read ahead are returned first. Raises curses.error on timeout. """
+        if self.__pendingKeys:
+            return self.__pendingKeys.popleft()
+        return self.__screen.get_wch()
 
-        curses.endwin() # Close curses terminal
+
+    def __get_available_key(self):
+        """ Returns the next key if it is available right away, otherwise None. """
+        self.__screen.timeout(0)
+        try:
+            return self.__get_key()
+        except curses.error:
+            return None
+
+
+    def __get_bracketed_paste(self):
+        """ Reads the rest of a bracketed paste after an <ESC> key and returns the pasted text (only unicode
+            characters, line breaks and tabs become spaces). Returns None if the <ESC> key did not start a paste, the
+            keys read while checking are then handled as usual.
+        """
+        self.__screen.timeout(self.__PASTE_TIMEOUT)
+
+        readKeys = list()
+        for expected in self.__PASTE_START[1:]:
+            try:
+                readKeys.append(self.__get_key())
+            except curses.error:
+                break
+            if readKeys[-1] != expected:
+                break
+
+        if readKeys != list(self.__PASTE_START[1:]):
+            self.__pendingKeys.extendleft(reversed(readKeys))
+            return None
+
+        # Collect the paste until the end sequence (Or until no more keys arrive)
+        pasted = list()
+        pasteEnd = list(self.__PASTE_END)
+        while pasted[-len(pasteEnd):] != pasteEnd:
+            try:
+                char = self.__get_key()
+            except curses.error:
+                break
+            if isinstance(char, str):
+                pasted.append(char)
+        else:
+            del pasted[-len(pasteEnd):]
+
+        text = "".join(pasted).replace("\r\n", " ").replace("\n", " ").replace("\r", " ").replace("\t", " ")
+        if not isUnicode(text):
+            text = "".join(char for char in text if isUnicode(char))
+        return text
+
+
+    def __insert_prompt_text(self, text):
+        """ Inserts text into the prompt at the cursor and moves the cursor to the end of it.
+            Arguments:
+                text                - The text to be inserted.              (str)
+        """
+        self.__prompt.insert(self.__promptCursorPos, text)
+        self.__promptCursorPos += len(text)
+        if (self.__promptVCursorPos + len(text)) >= self.__promptLineWidth:
+            self.__promptVCursorPos = self.__promptLineWidth
+        else:
+            self.__promptVCursorPos += len(text)
 
 
     ###################################################################################################################
@@ -1380,11 +2397,8 @@ class TerminalTextBoxes():
 
     def __init_colors(self):
         """ Initialize curses colors. """
-        curses.start_color()
-        curses.use_default_colors()
-
         for color, value in CHAR_COLOR.items():
-            curses.init_pair(value, value - 1, -1)
+            self.__screenBackend.init_color_pair(value, value - 1, -1)
 
 
     def __init_box_default_parameters(self, setupName, boxName):
@@ -1393,45 +2407,21 @@ class TerminalTextBoxes():
                 setupName           - The name of the box setup.            (str)
                 boxName             - The name of the text box.             (str)
         """
-        self.__boxSetup[setupName]["boxes"][boxName]                        = dict()
-        self.__boxSetup[setupName]["focusedBox"]                            = boxName
-
-        self.__boxSetup[setupName]["boxes"][boxName]["fixedWidth"]          = None
-        self.__boxSetup[setupName]["boxes"][boxName]["fixedHeight"]         = None
-        self.__boxSetup[setupName]["boxes"][boxName]["hOrient"]             = H_ORIENT["left"]
-        self.__boxSetup[setupName]["boxes"][boxName]["vOrient"]             = V_ORIENT["up"]
-        self.__boxSetup[setupName]["boxes"][boxName]["visable"]             = True
-        self.__boxSetup[setupName]["boxes"][boxName]["wTextIndent"]         = 0
-        self.__boxSetup[setupName]["boxes"][boxName]["hTextIndent"]         = 0
-        self.__boxSetup[setupName]["boxes"][boxName]["boxWidth"]            = None
-        self.__boxSetup[setupName]["boxes"][boxName]["boxHeight"]           = None
-        self.__boxSetup[setupName]["boxes"][boxName]["prevBoxWidth"]        = None
-        self.__boxSetup[setupName]["boxes"][boxName]["prevBoxHeight"]       = None
-        self.__boxSetup[setupName]["boxes"][boxName]["textWidth"]           = None
-        self.__boxSetup[setupName]["boxes"][boxName]["textHeight"]          = None
-        self.__boxSetup[setupName]["boxes"][boxName]["topLeft"]             = None
-        self.__boxSetup[setupName]["boxes"][boxName]["bottomRight"]         = None
-        self.__boxSetup[setupName]["boxes"][boxName]["textStartX"]          = 0
-        self.__boxSetup[setupName]["boxes"][boxName]["textStartY"]          = 0
-        self.__boxSetup[setupName]["boxes"][boxName]["frameAttrUnmerged"]   = "white"
-        self.__boxSetup[setupName]["boxes"][boxName]["frameAttr"]           = None
-        self.__boxSetup[setupName]["boxes"][boxName]["frameChar"]           = "singleLine"
-
-        self.__boxSetup[setupName]["boxes"][boxName]["textItems"]           = list()
-        self.__boxSetup[setupName]["boxes"][boxName]["prevTextItemsLength"] = 0
-        self.__boxSetup[setupName]["boxes"][boxName]["lines"]               = list()
-        self.__boxSetup[setupName]["boxes"][boxName]["scrollIndex"]         = 0
-
-        self.__boxSetup[setupName]["boxes"][boxName]["scrollVisable"]       = True
-        self.__boxSetup[setupName]["boxes"][boxName]["scrollChar"]          = "█"
-
-
-    def __reset_info_prompt(self):
-        """ Resets the info prompt (Removes potential info messages). """
-        startOfInfoPromptX = 0
-        startOfInfoPromptY = self.__hTerminal - 1 - self.__promptHeight
-        bg = self.__merge_attributes(self.__infoPromptCharAttr)
-        self.__screen.addstr(startOfInfoPromptY, startOfInfoPromptX, self.__wTerminal * self.__infoPromptChar, bg)
+        self.__boxSetup[setupName].boxes[boxName] = TextBox(boxName)
+        self.__boxSetup[setupName].focusedBox = self.__boxSetup[setupName].boxes[boxName]
+
+
+    def __bump_box_generation(self, box, content=True, style=False):
+        """ Bumps the generations of a box, the stages that depend on them process the box on next update.
+            Arguments:
+                box                 - The text box.                                 (TextBox)
+                content             - The text items or scroll position changed.    (bool)
+                style               - The frame or scrollbar style changed.         (bool)
+        """
+        if content:
+            box.contentGen += 1
+        if style:
+            box.styleGen += 1
 
 
     def __get_clipboard(self):
@@ -1456,37 +2446,108 @@ class TerminalTextBoxes():
     def __info_prompt_text_timeout(self):
         """ Timeout function for when info prompt should be cleared. """
         self.__infoPromptActive = False
-        self.__reset_info_prompt()
-        self.__update_visual_cursor()
-        self.__screen.refresh()
+        self.__dirtyInfoPrompt = True
+        self.__updateRequested.set()
 
 
     def __resize_timeout(self):
         """ Timeout function for when setup is ready to be refreshed. """
         self.__resizeDone = True
-        self.__screen.clear()
-        self.__screen.refresh()
-        self.update()
+        self.__dirtyAll = True
+        self.__updateRequested.set()
+
+
+    def __get_render_wait(self):
+        """ Returns the time (s) left until a requested update is allowed by the fps cap. """
+        if self.__maxFps == None:
+            return 0
+        return max(self.__lastRenderTime + 1 / self.__maxFps - time.monotonic(), 0)
+
+
+    def __drain_info_prompt_queue(self):
+        """ Sets the queued info prompt texts in order, the last one is shown. Called with self.__lock held. """
+        while self.__infoPromptQueue:
+            text, timeout = self.__infoPromptQueue.popleft()
+            self.__infoPromptCurrText = text
+            self.__infoPromptPending = True
+
+            if timeout != None:
+                self.__infoPromptTimer.cancel()
+                self.__infoPromptTimer = threading.Timer(timeout//1000, self.__info_prompt_text_timeout)
+                self.__infoPromptTimer.start()
+                self.__infoPromptActive = True
+
+            self.__dirtyInfoPrompt = True
+
+
+    def __drain_text_item_queue(self):
+        """ Adds all queued text items to their boxes. Called with self.__lock held. """
+        while self.__textItemQueue:
+            setupName, boxName, newItems = self.__textItemQueue.popleft()
+
+            # The box might have been removed after the items were queued
+            if setupName not in self.__boxSetup or boxName not in self.__boxSetup[setupName].boxes:
+                continue
+            box = self.__boxSetup[setupName].boxes[boxName]
+
+            # Text items of an inactive setup are only counted, they are wrapped once the setup is shown
+            inactive = self.__boxSetup[setupName] is not self.__activeSetup
+            if inactive:
+                box.pendingItems += len(newItems)
+
+            if box.maxItems != None:
+                newItems = newItems[-box.maxItems:]
+                for i in range(len(box.textItems) + len(newItems) - box.maxItems):
+                    self.__evict_text_item(box)
+
+            box.textItems.extend(newItems)
+            self.__bump_box_generation(box)
+
+            # maxLines bounds an inactive box as well, its text items are indexed with estimated line counts
+            if inactive and box.maxLines != None:
+                if box.linesStale or box.linesWidth != box.textWidth:
+                    box.lineIndex.rebuild([self.__get_line_count(box, item, True) for item in box.textItems])
+                    box.linesGen += 1
+                    box.linesWidth = box.textWidth
+                    box.linesStale = False
+                else:
+                    box.lineIndex.extend([self.__get_line_count(box, item, True)
+                                          for item in islice(box.textItems, len(box.lineIndex), None)])
+                box.exactFrom = len(box.textItems)
+                self.__trim_lines(box)
 
 
     def __merge_attributes(self, attributes):
         """ Merges all attribute values to a single attribute and returns it.
-            Raises exception if invalid attribute exist.
+            Raises exception if invalid attribute exist. Merged attributes are cached per attributes tuple.
             Arguments:
                 attributes          - What frame attributes should be used (color, text format).    (str/list)
         """
-        self.__check_attributes_valid(attributes)
+        if isinstance(attributes, CompiledAttributes):
+            return attributes
+
+        # The type is checked before the lookup, only validated str/list attributes are cached
+        if not (isinstance(attributes, list) or isinstance(attributes, str)):
+            raise Exception("Attributes needs to be either string or list.")
 
         if isinstance(attributes, str):
             attributes = [attributes]
 
+        try:
+            return self.__attributeCache[tuple(attributes)]
+        except (KeyError, TypeError):
+            pass
+
+        self.__check_attributes_valid(attributes)
+
         merged = 0
         for item in attributes:
             if item in CHAR_COLOR:
-                merged = merged | curses.color_pair(CHAR_COLOR[item])
+                merged = merged | self.__screenBackend.color_pair(CHAR_COLOR[item])
             elif item in CHAR_ATTR:
                 merged = merged | CHAR_ATTR[item]
 
+        self.__attributeCache[tuple(attributes)] = merged
         return merged
 
 
@@ -1525,21 +2586,30 @@ class TerminalTextBoxes():
         self.__is_type(boxName, str)
 
         if shouldExist:
-            if boxName not in self.__boxSetup[setupName]["boxes"]:
+            if boxName not in self.__boxSetup[setupName].boxes:
                 raise Exception(f"TextBox {boxName} does not exist.")
         else:
-            if boxName in self.__boxSetup[setupName]["boxes"]:
+            if boxName in self.__boxSetup[setupName].boxes:
                 raise Exception(f"TextBox {boxName} already exist.")
 
         return True
 
 
+    def __check_box_layout_valid(self, box):
+        """ Checks if the text area of a box has been laid out by an update.
+            Arguments:
+                box                 - The text box.                         (TextBox)
+        """
+        if box.textWidth == None or box.textHeight == None:
+            raise Exception("The box has not been laid out yet, run start() first.")
+
+
     def __check_attributes_valid(self, attributes):
         """ Checks if the given attributes are valid.
             Arguments:
                 attributes          - What frame attributes should be used (color, text format).    (str/list)
         """
-        if attributes == None:
+        if attributes == None or isinstance(attributes, CompiledAttributes):
             return None
 
         if not (isinstance(attributes, list) or isinstance(attributes, str)):
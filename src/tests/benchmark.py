@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Headless benchmark of the terminal text boxes module (append, wrap, update, resize, keystroke latency, setup
+    switching, unicode checks and memory).
+
+    Every result is a time or a memory size (lower is better). The results are printed and can be written as a JSON
+    baseline that a later run is compared against:
+
+        $ python benchmark.py --output baseline.json
+        $ python benchmark.py --baseline baseline.json
+"""
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import terminalTextBoxes as ttb
+from unicode import isUnicode
+
+
+TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore"
+TEXT_CYRILLIC = "Съешь же ещё этих мягких французских булок, да выпей чаю"
+
+
+def create(height, width, boxCount=1, virtual=False):
+    """ Returns a started TerminalTextBoxes on a virtual screen together with the screen.
+        Arguments:
+            height              - Terminal height.              (int)
+            width               - Terminal width.               (int)
+            boxCount            - Number of boxes.              (int)
+            virtual             - Create virtual boxes.         (bool)
+    """
+    screen = ttb.VirtualScreen(height, width)
+    tb = ttb.TerminalTextBoxes(screen=screen)
+    tb.create_text_box_setup("setup")
+    for i in range(boxCount):
+        tb.create_text_box("setup", f"box{i}", virtual=virtual)
+    tb.start(keyHandlerThread=False)
+    return tb, screen
+
+
+def fill(tb, boxName, count):
+    """ Adds count text items of varying length to a box.
+        Arguments:
+            tb                  - The TerminalTextBoxes.        (TerminalTextBoxes)
+            boxName             - The name of the box.          (str)
+            count               - Number of text items.         (int)
+    """
+    tb.add_text_items("setup", boxName, (f"{i} {TEXT[:(i * 7) % len(TEXT)]}" for i in range(count)))
+
+
+def timed(function, repeat=1):
+    """ Returns the median wall time (s) of calling function.
+        Arguments:
+            function            - The function to time.         (Function)
+            repeat              - Number of calls.              (int)
+    """
+    times = list()
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_append(results, count):
+    """ add_text_item/add_text_items throughput (Time per item, the items are wrapped on update and not included). """
+    tb, screen = create(50, 200)
+
+    start = time.perf_counter()
+    for i in range(count):
+        tb.add_text_item("setup", "box0", TEXT, ["white", "bold"])
+    results["append.add_text_item_us"] = (time.perf_counter() - start) / count * 1e6
+    tb.update()
+
+    token = tb.compile_attributes(["white", "bold"])
+    start = time.perf_counter()
+    for i in range(count):
+        tb.add_text_item("setup", "box0", TEXT, token)
+    results["append.add_text_item_compiled_us"] = (time.perf_counter() - start) / count * 1e6
+    tb.update()
+
+    start = time.perf_counter()
+    tb.add_text_items("setup", "box0", [TEXT] * count)
+    results["append.add_text_items_us"] = (time.perf_counter() - start) / count * 1e6
+    tb.update()
+
+
+def bench_wrap(results, counts):
+    """ Cost of wrapping all text items of a box (First update after filling it), plain and virtual box. """
+    for count in counts:
+        for virtual in (False, True):
+            tb, screen = create(50, 200, virtual=virtual)
+            fill(tb, "box0", count)
+            name = "virtual" if virtual else "plain"
+            results[f"wrap.{name}.{count}_ms"] = timed(tb.update) * 1e3
+
+
+def bench_update(results, sizes, boxCounts, repeat):
+    """ update() latency across terminal sizes and box counts (Full redraw and after one append). """
+    for height, width in sizes:
+        for boxCount in boxCounts:
+            tb, screen = create(height, width, boxCount)
+            for i in range(boxCount):
+                fill(tb, f"box{i}", 1000)
+            tb.update()
+
+            key = f"update.{height}x{width}.{boxCount}boxes"
+            results[f"{key}.full_ms"] = timed(lambda: tb.update(forceRedraw=True), repeat) * 1e3
+
+            def append_and_update():
+                tb.add_text_item("setup", "box0", TEXT)
+                tb.update()
+            results[f"{key}.append_ms"] = timed(append_and_update, repeat) * 1e3
+            results[f"{key}.idle_ms"] = timed(tb.update, repeat) * 1e3
+
+
+def bench_resize(results, count):
+    """ Time to reflow a filled box after a terminal resize. """
+    for virtual in (False, True):
+        tb, screen = create(50, 200, virtual=virtual)
+        fill(tb, "box0", count)
+        tb.update()
+
+        times = list()
+        for height, width in ((50, 160), (60, 240), (40, 120), (50, 200)):
+            # The KEY_RESIZE event is discarded, it would only delay the update
+            screen.resize(height, width)
+            screen.timeout(0)
+            screen.get_wch()
+            times.append(timed(tb.update))
+
+        name = "virtual" if virtual else "plain"
+        results[f"resize.{name}.{count}_ms"] = statistics.median(times) * 1e3
+
+
+def bench_keystroke(results, count, repeat):
+    """ Per keystroke latency of the prompt (key handled and screen updated), next to a filled box. """
+    tb, screen = create(50, 200)
+    fill(tb, "box0", count)
+    tb.update()
+
+    def keystroke():
+        screen.push_keys("a")
+        tb.process_input()
+    results["keystroke.char_ms"] = timed(keystroke, repeat) * 1e3
+
+    def scroll():
+        screen.push_keys([339])     # PAGE UP
+        tb.process_input()
+    results["keystroke.page_up_ms"] = timed(scroll, repeat) * 1e3
+
+
+def bench_switch(results, count, repeat):
+    """ Time to switch between two setups of four filled boxes and update, at the same terminal size, and to switch to
+        a setup after text items were added to it while it was inactive.
+    """
+    tb, screen = create(50, 200, 4)
+    tb.create_text_box_setup("other")
+    for i in range(4):
+        tb.create_text_box("other", f"box{i}")
+        tb.add_text_items("other", f"box{i}", (f"{j} {TEXT}" for j in range(count)))
+        fill(tb, f"box{i}", count)
+    tb.update()
+
+    setups = ["setup", "other"]
+    def switch():
+        setups.reverse()
+        tb.set_active_box_setup(setups[0])
+        tb.update()
+    switch()
+    results["switch.4boxes_ms"] = timed(switch, repeat) * 1e3
+
+    # Switch to a setup that text items were added to while it was inactive
+    if setups[0] == "other":
+        switch()
+    tb.add_text_items("other", "box0", (f"{j} {TEXT}" for j in range(count)))
+    tb.update()
+    results[f"switch.backlog.{count}_ms"] = timed(switch) * 1e3
+
+
+def bench_unicode(results, count):
+    """ isUnicode cost per character, for single typed keys and for a pasted string (ASCII and non-ASCII). """
+    for name, chars in (("ascii", TEXT), ("non_ascii", TEXT_CYRILLIC)):
+        paste = chars * (count // len(chars))
+
+        def keys():
+            for char in paste:
+                isUnicode(char)
+        results[f"unicode.{name}.char_ns"] = timed(keys) / len(paste) * 1e9
+        results[f"unicode.{name}.paste_ns"] = timed(lambda: isUnicode(paste)) / len(paste) * 1e9
+
+
+def bench_memory(results, count):
+    """ Memory per text item of a box, wrapped to one (short) and two (long) lines (The texts themselves excluded). """
+    for name, text in (("short", TEXT[:40]), ("long", TEXT * 3)):
+        tb, screen = create(50, 200)
+        texts = [f"{i} {text}" for i in range(count)]
+
+        tracemalloc.start()
+        tb.add_text_items("setup", "box0", texts)
+        tb.update()
+        results[f"memory.{name}.bytes_per_item"] = tracemalloc.get_traced_memory()[0] / count
+        tracemalloc.stop()
+
+
+def compare(results, baseline, threshold):
+    """ Prints the change of every result compared to a baseline, returns the number of regressions.
+        Arguments:
+            results             - The results of this run.                          (dict)
+            baseline            - The results of a previous run.                    (dict)
+            threshold           - Relative slow down that counts as a regression.   (float)
+    """
+    regressions = 0
+    for name, value in results.items():
+        if name not in baseline or baseline[name] == 0:
+            print(f"{name:<48} {value:12.4f}")
+            continue
+        change = value / baseline[name] - 1
+        regression = change > threshold
+        regressions += regression
+        print(f"{name:<48} {value:12.4f} {baseline[name]:12.4f} {change:+8.1%}{'  REGRESSION' if regression else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmark of the terminal text boxes module.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Compare the results to a JSON file of a previous run.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slow down that counts as a regression.")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes (Skips the 1M item wrap).")
+    args = parser.parse_args()
+
+    results = dict()
+    bench_append(results, 20000 if args.quick else 100000)
+    bench_wrap(results, (1000, 100000) if args.quick else (1000, 100000, 1000000))
+    bench_update(results, ((24, 80), (50, 200), (100, 300)), (1, 4, 8), 5 if args.quick else 20)
+    bench_resize(results, 10000 if args.quick else 100000)
+    bench_keystroke(results, 10000 if args.quick else 100000, 100 if args.quick else 500)
+    bench_switch(results, 10000 if args.quick else 100000, 100 if args.quick else 500)
+    bench_unicode(results, 100000 if args.quick else 1000000)
+    bench_memory(results, 20000 if args.quick else 200000)
+
+    regressions = 0
+    if args.baseline != None:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+    else:
+        compare(results, dict(), args.threshold)
+
+    if args.output != None:
+        with open(args.output, "w") as file:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results},
+                      file, indent=4)
+
+    sys.exit(1 if regressions else 0)
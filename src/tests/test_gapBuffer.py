@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Tests of the gap buffer against a plain string.
+
+        $ python -m unittest discover src/tests
+"""
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import random
+import unittest
+
+from gapBuffer import GapBuffer
+
+
+class TestGapBuffer(unittest.TestCase):
+    """ Edits of the gap buffer give the same string as the same edits of a str. """
+
+    def assert_matches(self, buffer, string):
+        """ Asserts that the gap buffer holds a given string.
+            Arguments:
+                buffer              - The gap buffer.               (GapBuffer)
+                string              - The expected string.          (str)
+        """
+        self.assertEqual(len(buffer), len(string))
+        self.assertEqual(buffer.get_string(), string)
+        gapStart = buffer._GapBuffer__gapStart
+        for start, end in ((0, len(string)), (gapStart - 2, gapStart + 2), (gapStart, gapStart + 3),
+                           (gapStart - 3, gapStart), (-5, 3), (len(string) - 2, len(string) + 5), (4, 2)):
+            self.assertEqual(buffer.get_slice(start, end), string[max(start, 0):max(end, 0)], (start, end))
+
+
+    def test_gap_edges(self):
+        buffer = GapBuffer("hello world")
+        string = "hello world"
+
+        # Right at, just before and just after the gap, then at both ends of the string
+        for position in (5, 5, 4, 6, 0, 11, 11):
+            buffer.insert(position, "ab")
+            string = string[:position] + "ab" + string[position:]
+            self.assert_matches(buffer, string)
+
+        for position in (4, 3, 5, 0, len(string) - 1):
+            buffer.delete(position, 2)
+            string = string[:position] + string[position + 2:]
+            self.assert_matches(buffer, string)
+
+
+    def test_growth(self):
+        # An insert longer than the gap grows it, before and after the gap was moved
+        buffer = GapBuffer("abc")
+        buffer.insert(1, "x" * 100)
+        buffer.insert(0, "y" * 300)
+        buffer.insert(len(buffer), "z" * 70)
+        self.assert_matches(buffer, "y" * 300 + "a" + "x" * 100 + "bc" + "z" * 70)
+
+
+    def test_delete_bounds(self):
+        buffer = GapBuffer("abcdef")
+        buffer.delete(4, 10)
+        buffer.delete(-1)
+        buffer.delete(4)
+        buffer.delete(1, 0)
+        self.assert_matches(buffer, "abcd")
+
+        buffer.clear()
+        self.assert_matches(buffer, "")
+        buffer.insert(0, "")
+        self.assert_matches(buffer, "")
+
+
+    def test_random_edits(self):
+        rand = random.Random(1)
+        buffer = GapBuffer()
+        string = ""
+        for i in range(2000):
+            gapStart = buffer._GapBuffer__gapStart
+            position = rand.choice((gapStart, gapStart - 1, gapStart + 1, 0, len(string), rand.randint(0, len(string))))
+            position = min(max(position, 0), len(string))
+            if rand.random() < 0.6:
+                text = "".join(rand.choice("abc") for j in range(rand.choice((1, 1, 3, 80))))
+                buffer.insert(position, text)
+                string = string[:position] + text + string[position:]
+            else:
+                count = rand.randint(1, 4)
+                buffer.delete(position, count)
+                string = string[:position] + string[position + count:]
+            self.assert_matches(buffer, string)
+
+
+if __name__ == "__main__":
+    unittest.main()
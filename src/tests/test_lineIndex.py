@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Tests of the line index against a plain list of line counts.
+
+        $ python -m unittest discover src/tests
+"""
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import random
+import unittest
+
+from lineIndex import LineIndex
+
+
+class TestLineIndex(unittest.TestCase):
+    """ Every query of the line index matches the same query over a list of line counts. """
+
+    def assert_matches(self, index, counts, lines=None):
+        """ Asserts that the line index holds the given line counts.
+            Arguments:
+                index               - The line index.                                       (LineIndex)
+                counts              - The expected line count of every text item.           (list)
+                lines               - The line offsets to find (None for every line).       (iterable)
+        """
+        self.assertEqual(len(index), len(counts))
+        self.assertEqual(index.get_total(), sum(counts))
+
+        prefix = 0
+        starts = list()
+        for i, count in enumerate(counts):
+            self.assertEqual(index.get_count(i), count)
+            self.assertEqual(index.get_prefix_sum(i), prefix)
+            starts.append(prefix)
+            prefix += count
+
+        for line in lines if lines != None else range(prefix):
+            # The last text item that starts at or before the line (Text items without lines are skipped)
+            item = max(i for i, start in enumerate(starts) if start <= line and counts[i] > 0)
+            self.assertEqual(index.find(line), (item, line - starts[item]))
+
+
+    def test_find(self):
+        rand = random.Random(1)
+        counts = [rand.choice((0, 1, 1, 2, 5)) for i in range(300)]
+        self.assert_matches(LineIndex(counts), counts)
+
+
+    def test_set_count(self):
+        rand = random.Random(2)
+        counts = [rand.randint(1, 4) for i in range(200)]
+        index = LineIndex(counts)
+        for i in range(100):
+            position = rand.randrange(len(counts))
+            counts[position] = rand.randint(0, 6)
+            index.set_count(position, counts[position])
+        self.assert_matches(index, counts)
+
+
+    def test_extend(self):
+        rand = random.Random(3)
+        counts = [rand.randint(1, 4) for i in range(400)]
+        index = LineIndex(counts[:100])
+
+        # Batches of up to len // 8 counts are appended, larger batches rebuild the tree
+        for batch in (counts[100:112], counts[112:113], counts[113:300], counts[300:400]):
+            index.extend(batch)
+        self.assert_matches(index, counts)
+
+        for count in (3, 0, 7):
+            index.append(count)
+            counts.append(count)
+        self.assert_matches(index, counts)
+
+
+    def test_pop_left(self):
+        rand = random.Random(4)
+        counts = [rand.randint(0, 4) for i in range(5000)]
+        index = LineIndex(counts)
+
+        # Removed counts are compacted once they pass 1024 and outnumber the kept ones
+        for i in range(4000):
+            index.pop_left()
+            if i % 3 == 0:
+                count = rand.randint(1, 4)
+                index.append(count)
+                counts.append(count)
+        counts = counts[4000:]
+        self.assertLess(index._LineIndex__head, 1024)
+        self.assert_matches(index, counts, rand.sample(range(sum(counts)), 200))
+
+        for i in range(len(counts)):
+            index.pop_left()
+        self.assert_matches(index, [])
+        with self.assertRaises(Exception):
+            index.pop_left()
+
+
+if __name__ == "__main__":
+    unittest.main()
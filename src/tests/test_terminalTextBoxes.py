@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Headless tests of the terminal text boxes module on a virtual screen.
+
+        $ python -m unittest discover src/tests
+"""
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import itertools
+import random
+import threading
+import unittest
+from unittest import mock
+
+import terminalTextBoxes as ttb
+
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+
+
+def random_text(rand):
+    """ Returns a text of random words.
+        Arguments:
+            rand                - The random generator.         (random.Random)
+    """
+    return " ".join(rand.choice(WORDS) for i in range(rand.randint(1, 30)))
+
+
+def get_box(tb, setupName, boxName):
+    """ Returns the TextBox of a box.
+        Arguments:
+            tb                  - The TerminalTextBoxes.        (TerminalTextBoxes)
+            setupName           - The name of the box setup.    (str)
+            boxName             - The name of the text box.     (str)
+    """
+    return tb._TerminalTextBoxes__boxSetup[setupName].boxes[boxName]
+
+
+class TestDeferredTextItems(unittest.TestCase):
+    """ Text items added to an inactive setup are deferred (see pendingItems in the docs). """
+
+    def setUp(self):
+        self.rand = random.Random(1)
+        self.screen = ttb.VirtualScreen(24, 90)
+        self.tb = ttb.TerminalTextBoxes(screen=self.screen)
+        self.tb.create_text_box_setup("hidden")
+        self.tb.create_text_box("hidden", "box", width=25, maxLines=40)
+        self.tb.create_text_box("hidden", "other")
+        self.tb.create_text_box_setup("shown")
+        self.tb.create_text_box("shown", "box")
+        self.tb.start(keyHandlerThread=False)
+        self.tb.update()
+
+
+    def tearDown(self):
+        self.tb.stop()
+
+
+    def test_max_lines_after_activation(self):
+        box = get_box(self.tb, "hidden", "box")
+        for i in range(20):
+            self.tb.add_text_items("hidden", "box", [random_text(self.rand) for j in range(50)])
+            self.tb.update()
+
+        self.tb.set_active_box_setup("hidden")
+        self.tb.update()
+        self.assertLessEqual(box.lineIndex.get_total(), 40)
+
+        # Idle steps until every deferred text item is wrapped
+        for i in range(100):
+            self.tb.process_input()
+            self.tb.update()
+            self.assertLessEqual(box.lineIndex.get_total(), 40)
+        self.assertEqual(box.exactFrom, 0)
+
+
+    def test_max_lines_while_inactive(self):
+        box = get_box(self.tb, "hidden", "box")
+
+        # Not laid out yet, every text item counts as one line
+        self.tb.add_text_items("hidden", "box", [random_text(self.rand) for j in range(1000)])
+        self.tb.update()
+        self.assertLessEqual(len(box.textItems), 40)
+
+        # Laid out once, the line counts are estimated
+        self.tb.set_active_box_setup("hidden")
+        self.tb.update()
+        self.tb.set_active_box_setup("shown")
+        self.tb.update()
+        for i in range(10):
+            self.tb.add_text_items("hidden", "box", [random_text(self.rand) for j in range(1000)])
+            self.tb.update()
+            self.assertLessEqual(box.lineIndex.get_total(), 40)
+        self.assertLess(len(box.textItems), 40)
+
+
+class TestAttributes(unittest.TestCase):
+    """ Attributes are validated before the merged attributes cache is looked up. """
+
+    def setUp(self):
+        self.tb = ttb.TerminalTextBoxes(screen=ttb.VirtualScreen(24, 90))
+        self.tb.create_text_box_setup("setup")
+        self.tb.create_text_box("setup", "box")
+
+
+    def test_cached_attributes(self):
+        self.tb.add_text_item("setup", "box", "text", ["red", "bold"])
+        self.tb.add_text_item("setup", "box", "text", ["red", "bold"])
+        with self.assertRaises(Exception):
+            self.tb.add_text_item("setup", "box", "text", ("red", "bold"))
+        with self.assertRaises(Exception):
+            self.tb.add_text_items("setup", "box", [("text", ("red", "bold"))])
+        with self.assertRaises(Exception):
+            self.tb.compile_attributes(["red", "notAnAttribute"])
+
+
+class TestInfoPromptText(unittest.TestCase):
+    """ set_info_prompt_text is queued like text items and never waits for an update in progress. """
+
+    def test_set_while_locked(self):
+        screen = ttb.VirtualScreen(24, 90)
+        tb = ttb.TerminalTextBoxes(screen=screen)
+        tb.create_text_box_setup("setup")
+        tb.create_text_box("setup", "box")
+        tb.start(keyHandlerThread=False)
+        tb.update()
+
+        # The lock is held through the terminal I/O of an update
+        with tb._TerminalTextBoxes__lock:
+            producer = threading.Thread(target=tb.set_info_prompt_text, args=("first",))
+            producer.start()
+            producer.join(1)
+            self.assertFalse(producer.is_alive())
+            tb.set_info_prompt_text("second")
+
+        tb.update()
+        self.assertIn(" second ", screen.get_lines()[-2])
+        tb.update()
+        self.assertNotIn("second", screen.get_lines()[-2])
+        tb.stop()
+
+
+class TestPromptCursor(unittest.TestCase):
+    """ The terminal cursor is left on the prompt, not where the last box pad was copied. """
+
+    def test_cursor_on_prompt(self):
+        rand = random.Random(1)
+        screen = ttb.VirtualScreen(16, 60)
+        tb = ttb.TerminalTextBoxes(screen=screen)
+        tb.create_text_box_setup("setup")
+        tb.create_text_box("setup", "left")
+        tb.create_text_box("setup", "right")
+        tb.add_text_items("setup", "left", [random_text(rand) for i in range(100)])
+        tb.add_text_items("setup", "right", [random_text(rand) for i in range(100)])
+        tb.start(keyHandlerThread=False)
+        tb.update()
+        self.assertEqual(screen.get_terminal_cursor(), (15, 2))
+
+        screen.push_keys([339])     # PAGE UP
+        tb.process_input()
+        self.assertEqual(screen.get_terminal_cursor(), (15, 2))
+
+        screen.push_keys("ab")
+        tb.process_input()
+        self.assertEqual(screen.get_terminal_cursor(), (15, 4))
+        tb.stop()
+
+
+class TestSmallTerminal(unittest.TestCase):
+    """ Terminals so small that the text areas have no rows are drawn without errors. """
+
+    def test_text_area_without_rows(self):
+        for height in (5, 6, 7, 8):
+            screen = ttb.VirtualScreen(height, 40)
+            tb = ttb.TerminalTextBoxes(screen=screen)
+            tb.create_text_box_setup("setup")
+            tb.create_text_box("setup", "left")
+            tb.create_text_box("setup", "right")
+            tb.start(keyHandlerThread=False)
+            tb.add_text_items("setup", "left", ["hello world"] * 10)
+            tb.update()
+            screen.push_keys([339])     # PAGE UP
+            tb.process_input()
+            tb.update(forceRedraw=True)
+            tb.stop()
+
+
+class TestFrameCache(unittest.TestCase):
+    """ The frame strings of box sizes of earlier terminal sizes are not kept. """
+
+    def test_resizes(self):
+        screen = ttb.VirtualScreen(24, 90)
+        tb = ttb.TerminalTextBoxes(screen=screen)
+        tb.create_text_box_setup("setup")
+        tb.create_text_box("setup", "left")
+        tb.create_text_box("setup", "right", frameChar="doubleLine")
+        tb.start(keyHandlerThread=False)
+        tb.update()
+
+        for width in range(60, 120):
+            screen.resize(24 + width % 7, width)
+            tb.process_input()
+            tb._TerminalTextBoxes__resize_timeout()
+            tb.update()
+            self.assertLessEqual(len(tb._TerminalTextBoxes__frameCache), 2)
+        self.assertIn("═", screen.get_lines()[0])
+        tb.stop()
+
+
+class TestIncrementalRender(unittest.TestCase):
+    """ An incremental update paints the same screen as a full repaint (update(forceRedraw=True)). """
+
+    def get_screen(self, screen):
+        """ Returns the characters and attributes of every row.
+            Arguments:
+                screen              - The virtual screen.           (VirtualScreen)
+        """
+        lines = screen.get_lines()
+        return lines, [[screen.get_attr(y, x) for x in range(len(line))] for y, line in enumerate(lines)]
+
+
+    def assert_incremental(self, tb, screen, msg=None):
+        """ Updates the screen, then asserts that a full repaint does not change it.
+            Arguments:
+                tb                  - The TerminalTextBoxes.        (TerminalTextBoxes)
+                screen              - The virtual screen.           (VirtualScreen)
+                msg                 - The failure message.          (str)
+        """
+        tb.update()
+        incremental = self.get_screen(screen)
+        tb.update(forceRedraw=True)
+        self.assertEqual(incremental, self.get_screen(screen), msg)
+
+
+    # A clock that advances 0.1 ms per reading, each idle step wraps the same number of deferred text items
+    @mock.patch("time.perf_counter", side_effect=itertools.count(0, 0.0001).__next__)
+    def test_idle_wrapping(self, perfCounter):
+        screen = ttb.VirtualScreen(24, 90)
+        tb = ttb.TerminalTextBoxes(screen=screen)
+        tb.create_text_box_setup("hidden")
+        tb.create_text_box("hidden", "box", width=25)
+        tb.create_text_box("hidden", "other")
+        tb.create_text_box_setup("shown")
+        tb.create_text_box("shown", "box")
+        tb.start(keyHandlerThread=False)
+        tb.set_active_box_setup("hidden")
+        tb.update()
+        tb.set_active_box_setup("shown")
+        tb.update()
+
+        # One word per wrapped line, more than the estimated line count
+        tb.add_text_items("hidden", "box", [" ".join(["consectetuer"] * 8)] * 1000)
+        tb.update()
+        tb.set_active_box_setup("hidden")
+        tb.update()
+        tb.scroll_to_percentage("hidden", "box", 50)
+        box = get_box(tb, "hidden", "box")
+        for i in range(100):
+            self.assert_incremental(tb, screen, f"idle step {i}")
+            if box.exactFrom == 0:
+                break
+            tb.process_input()
+        self.assertEqual(box.exactFrom, 0)
+        tb.stop()
+
+
+    def test_info_prompt_text_indent(self):
+        screens = list()
+        for indentFirst in (False, True):
+            screen = ttb.VirtualScreen(24, 20)
+            tb = ttb.TerminalTextBoxes(screen=screen)
+            tb.create_text_box_setup("setup")
+            tb.create_text_box("setup", "box")
+            if indentFirst:
+                tb.set_info_prompt_text_indent(8)
+            tb.start(keyHandlerThread=False)
+            tb.update()
+
+            # The min width of the info prompt is an edge condition of the layout
+            tb.set_info_prompt_text_indent(8)
+            tb.update()
+            screens.append(self.get_screen(screen))
+            tb.stop()
+
+        self.assertEqual(screens[0], screens[1])
+
+
+    # A clock that advances 2 ms per reading, each idle step wraps the same few deferred text items
+    @mock.patch("time.perf_counter", side_effect=itertools.count(0, 0.002).__next__)
+    def test_setup_switches(self, perfCounter):
+        for seed in range(4):
+            rand = random.Random(seed)
+            screen = ttb.VirtualScreen(24, 90)
+            tb = ttb.TerminalTextBoxes(screen=screen)
+            boxes = {"logs" : ("a", "b", "c"), "metrics" : ("x", "y")}
+            tb.create_text_box_setup("metrics")
+            tb.create_text_box("metrics", "x", maxLines=40)
+            tb.create_text_box("metrics", "y", width=30)
+            tb.create_text_box_setup("logs")
+            tb.create_text_box("logs", "a")
+            tb.create_text_box("logs", "b", maxLines=40)
+            tb.create_text_box("logs", "c", width=25, maxItems=50, virtual=True)
+            tb.start(keyHandlerThread=False)
+
+            for step in range(300):
+                setupName = rand.choice(list(boxes))
+                boxName = rand.choice(boxes[setupName])
+                action = rand.random()
+                if action < 0.4:
+                    texts = [random_text(rand) for i in range(rand.choice((1, 1, 5, 100)))]
+                    tb.add_text_items(setupName, boxName, texts)
+                elif action < 0.55:
+                    tb.set_active_box_setup(setupName)
+                elif action < 0.65:
+                    screen.push_keys([rand.choice(("x", 258, 259, 338, 339))])
+                    tb.process_input()
+                elif action < 0.7:
+                    tb.set_focus_box(setupName, boxName)
+                elif action < 0.75:
+                    tb.process_input()      # Idle step
+                elif action < 0.8 and get_box(tb, setupName, boxName).textWidth != None:
+                    tb.scroll_to_percentage(setupName, boxName, rand.randint(0, 100))
+
+                self.assert_incremental(tb, screen, f"seed {seed}, step {step}")
+
+            tb.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
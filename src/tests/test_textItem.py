@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Tests of the wrapped line spans of text items against textwrap.
+
+        $ python -m unittest discover src/tests
+"""
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import random
+import unittest
+from textwrap import wrap
+
+from textItem import TextItem
+
+
+TEXTS = [
+    "",
+    " ",
+    "   \t  ",
+    "word",
+    "word ",
+    " word",
+    "two words",
+    "exactly ten",
+    "a" * 25,
+    "short and then averyveryverylongwordthatneverfits and more",
+    "tabs\tand\nnewlines\r\nand\x0bvertical\x0cfeeds",
+    "trailing spaces on the last line      ",
+    "  leading  and  double  spaces  ",
+    "unicode åäö жизнь wörds",
+]
+
+
+class TestTextItem(unittest.TestCase):
+    """ The wrapped lines of a text item are the lines textwrap.wrap returns. """
+
+    def assert_wrapped(self, text, width):
+        """ Asserts that a text wrapped to a given width has the lines of textwrap.wrap.
+            Arguments:
+                text                - The text.                                     (str)
+                width               - The text width.                               (int)
+        """
+        lines = wrap(text, width)
+        item = TextItem(text, 0, 0)
+        item.wrap(width)
+
+        msg = f"{text!r} at width {width}"
+        self.assertEqual(item.wrapWidth, width, msg)
+        self.assertEqual(item.get_lines(), lines, msg)
+        self.assertEqual(item.get_line_count(), len(lines), msg)
+        for start in range(len(lines) + 1):
+            self.assertEqual(item.get_lines(start), lines[start:], msg)
+
+
+    def test_wrap(self):
+        for text in TEXTS:
+            for width in (1, 2, 5, 10, 11, 24, 25, 26, 80):
+                self.assert_wrapped(text, width)
+
+
+    def test_wrap_random(self):
+        rand = random.Random(1)
+        chars = "abc  \t\n-."
+        for i in range(500):
+            text = "".join(rand.choice(chars) for j in range(rand.randint(0, 60)))
+            self.assert_wrapped(text, rand.randint(1, 30))
+
+
+    def test_one_line(self):
+        # A text that fits keeps no spans, a text that fits after textwrap strips it keeps its end
+        item = TextItem("fits", 0, 0)
+        item.wrap(10)
+        self.assertEqual((item.spans, item.get_lines(), item.get_line_count()), (None, ["fits"], 1))
+
+        item = TextItem("fits  ", 0, 0)
+        item.wrap(10)
+        self.assertEqual((item.spans, item.get_lines(), item.get_line_count()), (4, ["fits"], 1))
+
+
+    def test_text_kept(self):
+        # The whitespace of a text that is not printable is only replaced in the copy the lines are sliced from
+        for text in (TEXTS[2], TEXTS[10], "a\tb" * 20, "ctrl\x1bchars\x00and\x7f more words " * 3):
+            item = TextItem(text, 0, 0)
+            for width in (5, 10, 80):
+                item.wrap(width)
+                self.assertEqual(item.text, text)
+                self.assertEqual(item.get_lines(), wrap(text, width))
+            item.truncate(10)
+            self.assertEqual(item.text, text)
+            self.assertEqual(item.get_lines(), [text[:10]])
+
+
+    def test_rewrap(self):
+        item = TextItem(TEXTS[9], 0, 0)
+        for width in (10, 40, 3, 10):
+            item.wrap(width)
+            self.assertEqual(item.get_lines(), wrap(TEXTS[9], width))
+
+
+    def test_truncate(self):
+        item = TextItem(TEXTS[9], 0, 0)
+        item.wrap(10)
+        item.truncate(10)
+        self.assertEqual(item.get_lines(), [TEXTS[9][:10]])
+        self.assertEqual(item.get_lines(1), [])
+        self.assertEqual(item.get_line_count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import deque
+
+from lineIndex import LineIndex
+
+
+class TextBox():
+    """ The state of a text box (see Text box parameters in the docs). Slotted, so the render stages and the key
+        handler read the state as attributes instead of dictionary lookups.
+    """
+
+    __slots__ = ("name", "fixedWidth", "fixedHeight", "hOrient", "vOrient", "visable", "wTextIndent", "hTextIndent",
+                 "boxWidth", "boxHeight", "textWidth", "textHeight", "topLeft", "bottomRight", "textStartX",
+                 "textStartY", "frameAttrUnmerged", "frameAttr", "frameChar", "textItems", "maxItems", "lineIndex",
+                 "exactFrom", "pendingItems", "maxLines", "virtual", "linesWidth", "linesStale", "scrollIndex",
+                 "linesGen", "pad", "padKey", "padStart", "padEnd", "padRow", "padChanged", "scrollVisable",
+                 "scrollChar", "contentGen", "geometryGen", "styleGen", "wrappedGen", "frameGen", "bodyGen",
+                 "scrollGen", "perfRenderTime", "perfRenderTimes")
+
+    def __init__(self, name):
+        """ Init with default parameters.
+            Arguments:
+                name                - The name of the text box.             (str)
+        """
+        self.name                   = name
+
+        self.fixedWidth             = None
+        self.fixedHeight            = None
+        self.hOrient                = 0     # H_ORIENT["left"]
+        self.vOrient                = 0     # V_ORIENT["up"]
+        self.visable                = True
+        self.wTextIndent            = 0
+        self.hTextIndent            = 0
+        self.boxWidth               = None
+        self.boxHeight              = None
+        self.textWidth              = None
+        self.textHeight             = None
+        self.topLeft                = None
+        self.bottomRight            = None
+        self.textStartX             = 0
+        self.textStartY             = 0
+        self.frameAttrUnmerged      = "white"
+        self.frameAttr              = None
+        self.frameChar              = "singleLine"
+
+        self.textItems              = deque()
+        self.maxItems               = None
+        self.lineIndex              = LineIndex()
+        self.exactFrom              = 0
+        self.pendingItems           = 0     # Text items added while the setup was inactive, not indexed yet
+        self.maxLines               = None
+        self.virtual                = False
+        self.linesWidth             = None
+        self.linesStale             = False
+        self.scrollIndex            = 0
+
+        self.linesGen               = 0     # Bumped when lines are renumbered
+        self.pad                    = None
+        self.padKey                 = None  # (lines, geometry) generations
+        self.padStart               = 0
+        self.padEnd                 = 0
+        self.padRow                 = 0
+        self.padChanged             = False
+
+        self.scrollVisable          = True
+        self.scrollChar             = "█"
+
+        # Generations, a stage skips the box while the generations it depends on match the ones it last used
+        self.contentGen             = 0     # Text items, scroll position
+        self.geometryGen            = 0     # Box position/size, text area
+        self.styleGen               = 0     # Frame and scrollbar style
+        self.wrappedGen             = None  # (content, geometry)
+        self.frameGen               = None  # (geometry, style)
+        self.bodyGen                = None  # (content, geometry)
+        self.scrollGen              = None  # (content, geometry, style)
+
+        self.perfRenderTime         = 0
+        self.perfRenderTimes        = deque(maxlen=1000)
+
+
+
+class BoxSetup():
+    """ A text box setup, its text boxes in display order and the focused text box. A setup keeps its own layout
+        and a window with its frames and scrollbars, so switching back to it at the same terminal size only copies
+        the window and the box pads to the screen.
+    """
+
+    __slots__ = ("name", "boxes", "boxOrder", "focusedBox", "layoutKey", "layoutFits", "window", "paintKey")
+
+    def __init__(self, name):
+        """ Init.
+            Arguments:
+                name                - The name of the box setup.            (str)
+        """
+        self.name                   = name
+        self.boxes                  = dict()    # Box name -> TextBox, in display order
+        self.boxOrder               = list()    # Box names in display order
+        self.focusedBox             = None      # The focused TextBox
+
+        self.layoutKey              = None      # Terminal size, layout version and debug settings of the layout
+        self.layoutFits             = False     # The layout satisfies the edge conditions
+        self.window                 = None      # Pad of the terminal size with the frames and scrollbars
+        self.paintKey               = None      # Terminal size and debug settings the window was painted for
+                                                # (None : repaint on next update)
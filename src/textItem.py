@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from array import array
+from textwrap import wrap
+
+
+# textwrap replaces every whitespace character with a space (after expanding tabs)
+WHITESPACE_TRANS = {ord(char) : " " for char in "\t\n\x0b\x0c\r"}
+
+
+class TextItem():
+    """ A text item of a text box. Slotted to keep the memory per item low, the wrapped lines are kept as spans
+        (start, end) into the text instead of copied substrings and a text item that fits on one line has no spans.
+    """
+
+    __slots__ = ("text", "attr", "lineType", "wrapWidth", "spans", "wrapText")
+
+    def __init__(self, text, attr, lineType):
+        """ Init.
+            Arguments:
+                text                - The text.                                     (str)
+                attr                - The merged text attributes.                   (int)
+                lineType            - The line type (LINE_TYPE value).              (int)
+        """
+        self.text = text
+        self.attr = attr
+        self.lineType = lineType
+        self.wrapWidth = None       # The text width of the spans (None until wrapped)
+        self.spans = None           # Flat array of line start/end offsets, or for one line starting at the start
+                                    # of the text its end (None : text[:wrapWidth])
+        self.wrapText = None        # The text with its whitespace replaced like textwrap does, that the spans are
+                                    # offsets into (None : the text is printable and the spans are into the text)
+
+
+    def get_line_count(self):
+        """ Returns the number of wrapped lines. """
+        return 1 if self.spans == None or isinstance(self.spans, int) else len(self.spans) // 2
+
+
+    def get_lines(self, start=0):
+        """ Returns the wrapped lines from a given line.
+            Arguments:
+                start               - The index of the first line.                  (int)
+        """
+        if self.spans == None:
+            return [self.text[:self.wrapWidth]] if start == 0 else []
+        text = self.text if self.wrapText == None else self.wrapText
+        if isinstance(self.spans, int):
+            return [text[:self.spans]] if start == 0 else []
+
+        spans = self.spans
+        return [text[spans[i]:spans[i + 1]] for i in range(start * 2, len(spans), 2)]
+
+
+    def truncate(self, width):
+        """ Makes the text item a single line, truncated to a given width.
+            Arguments:
+                width               - The text width.                               (int)
+        """
+        self.wrapWidth = width
+        self.spans = None
+        self.wrapText = None
+
+
+    def wrap(self, width):
+        """ Wraps the text item to a given width, the lines are the same as textwrap.wrap returns.
+            Arguments:
+                width               - The text width.                               (int)
+        """
+        self.wrapWidth = width
+        self.wrapText = None
+
+        # A printable text that fits is its own only line
+        if len(self.text) <= width and self.text.isprintable() and self.text.strip() != "" and \
+                not self.text.endswith(" "):
+            self.spans = None
+            return
+
+        # Every wrapped line is a substring of the text once its whitespace is replaced like textwrap does, the
+        # text itself is kept as given
+        text = self.text
+        if not text.isprintable():
+            text = self.wrapText = text.expandtabs().translate(WHITESPACE_TRANS)
+
+        spans = array("I")
+        position = 0
+        for line in wrap(text, width):
+            position = text.find(line, position)
+            spans.append(position)
+            position += len(line)
+            spans.append(position)
+        self.spans = spans[1] if len(spans) == 2 and spans[0] == 0 else spans
@@ -229,9 +229,12 @@ ALL_UNICODE =   BASIC_LATIN + \
 
 
 
+# Same characters as ALL_UNICODE, membership is checked in O(1) instead of scanning the list
+ALL_UNICODE_SET = frozenset(ALL_UNICODE)
+
+
 def isUnicode(character):
-    """ Returns true if char i unicode. """
-    if character in ALL_UNICODE:
-        return True
-    else:
+    """ Returns true if char i unicode. A whole string (e.g. a paste) is true if all of its characters are unicode. """
+    if not isinstance(character, str) or character == "":
         return False
+    return ALL_UNICODE_SET.issuperset(character)